@@ -258,8 +258,7 @@ async def toggle_test_mode(
         data_cache.using_cached_data = True
         
         # Set all cached fields to true since we're using all cached data
-        for field in data_cache.cached_fields:
-            data_cache.cached_fields[field] = True
+        data_cache.cached_fields = dict.fromkeys(data_cache.cached_fields, True)
             
         logger.info("🔵 TEST MODE: Enabled via admin toggle")
         
@@ -271,8 +270,7 @@ async def toggle_test_mode(
         data_cache.using_cached_data = False
         
         # Reset all cached field flags to False
-        for field in data_cache.cached_fields:
-            data_cache.cached_fields[field] = False
+        data_cache.cached_fields = dict.fromkeys(data_cache.cached_fields, False)
         
         # Force a refresh with fresh data
         logger.info("🔵 TEST MODE: Disabled via admin toggle")
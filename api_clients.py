@@ -1,4 +1,6 @@
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
 import logging
 import os
@@ -15,6 +17,38 @@ from config import (
 # Path for fallback data cache
 FALLBACK_DATA_PATH = os.path.join(os.path.dirname(__file__), "data", "synoptic_fallback_data.json")
 
+# Longest Retry-After (seconds) the session will honour before retrying
+MAX_RETRY_AFTER = 10
+
+class _CappedRetry(Retry):
+    """Retry that waits for the API's Retry-After, but no longer than MAX_RETRY_AFTER."""
+
+    def parse_retry_after(self, retry_after: str) -> float:
+        return min(super().parse_retry_after(retry_after), MAX_RETRY_AFTER)
+
+def _create_session() -> requests.Session:
+    """
+    Create the HTTP session shared by all Synoptic API calls.
+
+    Reusing one session keeps connections to the API alive between refreshes
+    instead of opening a new TCP/TLS connection for every request. Transient
+    5xx and rate-limited (429) responses are retried by the adapter, waiting
+    for any Retry-After the API sends on 429/503; auth errors (401/403) are
+    still handled by get_weather_data.
+    """
+    session = requests.Session()
+    retries = _CappedRetry(
+        total=3,
+        backoff_factor=0.3,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=["GET"],
+        raise_on_status=False  # Hand the last response back instead of raising
+    )
+    session.mount("https://", HTTPAdapter(pool_connections=10, pool_maxsize=20, max_retries=retries))
+    return session
+
+_SESSION = _create_session()
+
 def configure_production_environment() -> Dict[str, Any]:
     """
     Configure request parameters for API calls.
@@ -54,10 +88,11 @@ def get_api_token(request_params: Optional[Dict[str, Any]] = None) -> Optional[s
         token_url = f"{SYNOPTIC_BASE_URL}/auth?apikey={SYNOPTIC_API_KEY}"
         logger.info(f"🔑 Attempting to fetch API token from Synoptic API")
 
-        response = requests.get(
+        response = _SESSION.get(
             token_url, 
             headers=request_params.get("headers", {}),
-            proxies=request_params.get("proxies")
+            proxies=request_params.get("proxies"),
+            timeout=10
         )
         response.raise_for_status()
         token_data = response.json()
@@ -177,7 +212,7 @@ def get_weather_data(location_ids: str, retry_count: int = 0, max_retries: int =
 
         # Make the request with production environment parameters
         try:
-            response = requests.get(
+            response = _SESSION.get(
                 request_url, 
                 headers=request_params.get("headers", {}),
                 proxies=request_params.get("proxies"),
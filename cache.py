@@ -5,10 +5,127 @@ import os
 import json
 from datetime import datetime, timedelta
 from typing import Dict, Any, Optional
-import pytz
+from collections import deque
+from collections.abc import MutableMapping
 from pathlib import Path
 
-from config import TIMEZONE, logger
+from config import TIMEZONE, WEATHER_CACHE_FILE, logger
+
+# Bit assigned to each weather field in DataCache.cached_mask
+_FIELD_BITS = {
+    "temperature": 1,
+    "humidity": 2,
+    "wind_speed": 4,
+    "soil_moisture": 8,
+    "wind_gust": 16,
+}
+
+# Internal field name and the fire_risk_data["weather"] key it is read from
+_FIELD_MAP = (
+    ("temperature", "air_temp"),
+    ("humidity", "relative_humidity"),
+    ("wind_speed", "wind_speed"),
+    ("soil_moisture", "soil_moisture_15cm"),
+    ("wind_gust", "wind_gust"),
+)
+_WEATHER_KEYS = dict(_FIELD_MAP)
+
+
+class CachedFieldsView(MutableMapping):
+    """Dict-like view of a DataCache's cached-field bitmask.
+
+    Reads and writes go straight to the owning cache's ``cached_mask``, so
+    existing code like ``data_cache.cached_fields["wind_gust"] = True`` keeps
+    working. Use ``copy()`` to get a plain dict, e.g. for JSON responses.
+    """
+
+    __slots__ = ("_cache",)
+
+    def __init__(self, cache: "DataCache"):
+        self._cache = cache
+
+    def __getitem__(self, field: str) -> bool:
+        return bool(self._cache.cached_mask & _FIELD_BITS[field])
+
+    def __setitem__(self, field: str, is_cached: bool) -> None:
+        bit = _FIELD_BITS[field]
+        if is_cached:
+            self._cache.cached_mask |= bit
+        else:
+            self._cache.cached_mask &= ~bit
+
+    def __delitem__(self, field: str) -> None:
+        raise TypeError("Cached fields cannot be removed")
+
+    def __iter__(self):
+        return iter(_FIELD_BITS)
+
+    def __len__(self) -> int:
+        return len(_FIELD_BITS)
+
+    def copy(self) -> Dict[str, bool]:
+        return dict(self.items())
+
+    def __repr__(self) -> str:
+        return repr(self.copy())
+
+
+class CircuitBreaker:
+    """Rolling-window circuit breaker for the upstream weather API.
+
+    Each fetch attempt is recorded as a ``(monotonic time, success)`` entry in
+    ``outcomes``. Once the last ``sampling_duration`` seconds hold at least
+    ``minimum_throughput`` attempts and the failure ratio reaches
+    ``failure_threshold``, the circuit opens for ``break_duration`` seconds.
+    After that it is half-open: the window starts over and the next attempt is
+    a trial. A failed trial reopens the circuit at once; a successful one
+    closes it.
+    """
+
+    def __init__(self, failure_threshold: float = 0.5, sampling_duration: float = 60,
+                 minimum_throughput: int = 4, break_duration: float = 30):
+        self.failure_threshold = failure_threshold
+        self.sampling_duration = sampling_duration
+        self.minimum_throughput = minimum_throughput
+        self.break_duration = break_duration
+        self.outcomes: deque = deque()
+        self.opened_at: Optional[float] = None
+        self.half_open: bool = False
+
+    def record(self, success: bool) -> None:
+        """Record the outcome of one fetch attempt."""
+        now = time.monotonic()
+        self.outcomes.append((now, success))
+        if self.half_open:
+            self.half_open = False
+            if not success:
+                logger.warning("Circuit breaker reopened: trial API call failed")
+                self.opened_at = now
+
+    def is_open(self) -> bool:
+        """Return True while API calls should be skipped."""
+        now = time.monotonic()
+        if self.opened_at is not None:
+            if now - self.opened_at < self.break_duration:
+                return True
+            # Break is over - start a new window with a trial call
+            self.opened_at = None
+            self.outcomes.clear()
+            self.half_open = True
+
+        # Drop outcomes that have left the sampling window
+        while self.outcomes and now - self.outcomes[0][0] > self.sampling_duration:
+            self.outcomes.popleft()
+
+        if len(self.outcomes) < self.minimum_throughput:
+            return False
+        failures = sum(1 for _, success in self.outcomes if not success)
+        if failures / len(self.outcomes) >= self.failure_threshold:
+            logger.warning(f"Circuit breaker opened: {failures}/{len(self.outcomes)} API calls failed in the last {self.sampling_duration}s")
+            self.opened_at = now
+            return True
+        return False
+
 
 class DataCache:
     # Default values for when no data is available
@@ -22,6 +139,8 @@ class DataCache:
     }
     
     def __init__(self):
+        # One bit per field in _FIELD_BITS; set when the field is using cached data
+        self.cached_mask: int = 0
         self.synoptic_data: Optional[Dict[str, Any]] = None
         self.wunderground_data: Optional[Dict[str, Any]] = None
         self.fire_risk_data: Optional[Dict[str, Any]] = None
@@ -32,12 +151,17 @@ class DataCache:
         self.update_in_progress: bool = False
         self.last_update_success: bool = False
         self.max_retries: int = 5  # Increased from 3 to 5
-        self.retry_delay: int = 5  # seconds
+        self.retry_delay: int = 5  # seconds - base of the exponential retry backoff
+        self.max_retry_delay: int = 60  # seconds - cap on a single retry backoff
         self.update_timeout: int = 30  # seconds - increased from 15s to give more time for refresh
         self.background_refresh_interval: int = 10  # minutes
+        self.fresh_ttl: int = 60  # seconds - unforced refreshes of newer data are skipped
+        self.stale_ttl: int = 600  # seconds - older than fresh_ttl but newer than this is refreshed in the background
         self.data_timeout_threshold: int = 30  # minutes - max age before data is considered too old
         self.refresh_task_active: bool = False
         self.last_email_send_outcome: Optional[str] = None # To track email sending status for UI feedback
+        # Stops refreshes from calling the API during a sustained outage
+        self.circuit = CircuitBreaker(failure_threshold=0.5, sampling_duration=60, minimum_throughput=4, break_duration=30)
         # Lock for thread safety
         self._lock = threading.Lock()
         # Event to signal when an update is complete
@@ -45,7 +169,7 @@ class DataCache:
         
         # Set up cache file path - store in data directory
         self.cache_dir = Path("data")
-        self.cache_file = self.cache_dir / "weather_cache.json"
+        self.cache_file = self.cache_dir / WEATHER_CACHE_FILE
         
         # Initialize with current time
         current_time = datetime.now(TIMEZONE)
@@ -81,13 +205,7 @@ class DataCache:
                 "timestamp": current_time,
             }
             # Initialize cache fields flags - mark as NOT cached to force API data fetch
-            self.cached_fields: Dict[str, bool] = {
-                "temperature": False,  # Initialize without using cached data
-                "humidity": False,
-                "wind_speed": False,
-                "soil_moisture": False,
-                "wind_gust": False
-            }
+            self.cached_mask = 0  # Initialize without using cached data
             # IMPORTANT: Set to FALSE by default - do not start in test mode
             self.using_cached_data: bool = False  # Start in normal mode, not test mode
             self.using_default_values: bool = True  # Still track that we're using defaults
@@ -101,21 +219,36 @@ class DataCache:
             if "previous_risk_level" in disk_cache:
                 self.previous_risk_level = disk_cache["previous_risk_level"]
 
-    def is_stale(self, max_age_minutes: int = 15) -> bool:
-        """Check if the data is stale (older than max_age_minutes)"""
+    @property
+    def cached_fields(self) -> CachedFieldsView:
+        """Per-field cached flags as a dict-like view of cached_mask"""
+        return CachedFieldsView(self)
+
+    @cached_fields.setter
+    def cached_fields(self, fields: Dict[str, bool]) -> None:
+        mask = 0
+        for field, is_cached in fields.items():
+            if is_cached:
+                mask |= _FIELD_BITS[field]
+        self.cached_mask = mask
+
+    def is_stale(self, max_age_minutes: int = 15, now: Optional[datetime] = None) -> bool:
+        """Check if the data is stale (older than max_age_minutes), as of now or the clock"""
         if self.last_updated is None:
             return True
         # Use timezone-aware comparison
-        now = datetime.now(TIMEZONE)
+        if now is None:
+            now = datetime.now(TIMEZONE)
         age = now - self.last_updated
         return age > timedelta(minutes=max_age_minutes)
     
-    def is_critically_stale(self) -> bool:
-        """Check if the data is critically stale (older than data_timeout_threshold)"""
+    def is_critically_stale(self, now: Optional[datetime] = None) -> bool:
+        """Check if the data is critically stale (older than data_timeout_threshold), as of now or the clock"""
         if self.last_updated is None:
             return True
         # Use timezone-aware comparison
-        now = datetime.now(TIMEZONE)
+        if now is None:
+            now = datetime.now(TIMEZONE)
         age = now - self.last_updated
         return age > timedelta(minutes=self.data_timeout_threshold)
     
@@ -125,7 +258,7 @@ class DataCache:
         current_time = datetime.now(TIMEZONE)
         
         # Save the current cached fields state before updating
-        cached_fields_state = self.cached_fields.copy()
+        cached_mask_state = self.cached_mask
         using_cached_data_state = self.using_cached_data
         
         with self._lock:
@@ -168,10 +301,10 @@ class DataCache:
                 
                 # Check if wind_speed is present in the fresh data
                 if weather.get("wind_speed") is not None:
-                    cached_fields_state["wind_speed"] = False
+                    cached_mask_state &= ~_FIELD_BITS["wind_speed"]
                 else:
                     # If wind_speed is None, it should be marked as cached
-                    cached_fields_state["wind_speed"] = True
+                    cached_mask_state |= _FIELD_BITS["wind_speed"]
                     
                 # Check if wind_gust is present in the fresh data
                 if weather.get("wind_gust") is not None:
@@ -179,19 +312,19 @@ class DataCache:
                     wind_gust_stations = weather.get("wind_gust_stations", {})
                     for station in wind_gust_stations.values():
                         if station.get("is_cached", False):
-                            cached_fields_state["wind_gust"] = True
+                            cached_mask_state |= _FIELD_BITS["wind_gust"]
                             break
                     else:
                         # If no station is cached, mark as not cached
-                        cached_fields_state["wind_gust"] = False
+                        cached_mask_state &= ~_FIELD_BITS["wind_gust"]
                 else:
                     # If wind_gust is None, it should be marked as cached
-                    cached_fields_state["wind_gust"] = True
+                    cached_mask_state |= _FIELD_BITS["wind_gust"]
             
             # Now restore the cached_fields and using_cached_data state
-            self.cached_fields = cached_fields_state
+            self.cached_mask = cached_mask_state
             # Recalculate using_cached_data based on actual field states
-            self.using_cached_data = any(self.cached_fields.values())
+            self.using_cached_data = self.cached_mask != 0
             
             # Log cache state for monitoring
             logger.info(f"Cache state after update: using_cached_data={self.using_cached_data}")
@@ -328,7 +461,7 @@ class DataCache:
             
             # Always initialize in normal mode, regardless of disk cache state
             # This ensures the system doesn't start in test mode by default
-            self.cached_fields = {field: False for field in ["temperature", "humidity", "wind_speed", "soil_moisture", "wind_gust"]}
+            self.cached_mask = 0
             self.using_cached_data = False  # ALWAYS start in normal mode
             
             # Log startup state
@@ -435,6 +568,15 @@ class DataCache:
             # FIXED: Issue 4.1 - Events not being properly reset
             # Previous implementation was double-clearing the event (direct + threadsafe)
             # Now we prioritize the threadsafe approach when a loop is active
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:
+                pass
+            else:
+                # Already on the loop thread: clear now, so callers that wait
+                # right after a refresh starts don't see the previous update's event
+                self._update_complete_event.clear()
+                return
             loop = asyncio.get_event_loop()
             if not loop.is_closed():
                 loop.call_soon_threadsafe(self._update_complete_event.clear)
@@ -446,6 +588,10 @@ class DataCache:
             self._update_complete_event.clear()
             logger.error(f"Error resetting update event: {e}")
     
+    def set_update_event(self):
+        """Signal waiters that the current update cycle has finished"""
+        self._update_complete_event.set()
+    
     async def wait_for_update(self, timeout=None):
         """Wait for the current update to complete, with an optional timeout"""
         if timeout is None:
@@ -493,15 +639,7 @@ class DataCache:
             The field value, guaranteed to never be None
         """
         # Map from internal field name to API response field name
-        field_mapping = {
-            "temperature": "air_temp",
-            "humidity": "relative_humidity",
-            "wind_speed": "wind_speed",
-            "soil_moisture": "soil_moisture_15cm",
-            "wind_gust": "wind_gust"
-        }
-        
-        response_field_name = field_mapping.get(field_name)
+        response_field_name = _WEATHER_KEYS.get(field_name)
         
         # First try to get the value from the current fire_risk_data
         if (self.fire_risk_data and 
@@ -521,10 +659,10 @@ class DataCache:
             # Only update the cached flag if it's not a cached value
             if not is_cached:
                 # Reset cached flag for this field since we're using direct value
-                self.cached_fields[field_name] = False
+                self.cached_mask &= ~_FIELD_BITS[field_name]
                 
                 # Check if any field is still using cached data
-                self.using_cached_data = any(self.cached_fields.values())
+                self.using_cached_data = self.cached_mask != 0
             
             return self.fire_risk_data["weather"][response_field_name]
         
@@ -638,17 +776,8 @@ class DataCache:
         # Make a copy to avoid modifying the original
         completed_data = weather_data.copy()
         
-        # Map from API response field name to internal field name
-        field_mapping = {
-            "air_temp": "temperature",
-            "relative_humidity": "humidity",
-            "wind_speed": "wind_speed",
-            "soil_moisture_15cm": "soil_moisture",
-            "wind_gust": "wind_gust"
-        }
-        
         # Ensure each field has a value
-        for api_field, internal_field in field_mapping.items():
+        for internal_field, api_field in _FIELD_MAP:
             if api_field not in completed_data or completed_data[api_field] is None:
                 # Field is missing or None, get a value for it
                 value = self.get_field_value(internal_field, use_default_if_missing)
@@ -51,6 +51,9 @@ THRESH_TEMP_CELSIUS = (THRESH_TEMP - 32) * 5/9
 # Timezone configuration
 TIMEZONE = pytz.timezone('America/Los_Angeles')
 
+# Disk cache file name (inside the data/ directory)
+WEATHER_CACHE_FILE = os.getenv("WEATHER_CACHE_FILE", "weather_cache.json")
+
 # Log configuration values
 if not SYNOPTIC_API_KEY:
     logger.warning("No API key provided. Set SYNOPTICDATA_API_KEY environment variable.")
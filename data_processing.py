@@ -1,4 +1,5 @@
 from datetime import datetime
+from functools import lru_cache
 from typing import Dict, Any, List, Tuple, Optional
 
 from datetime import datetime, timedelta
@@ -297,11 +298,16 @@ def combine_weather_data(
         },
         # Use timezone-aware datetime
         "cache_timestamp": datetime.now(TIMEZONE).isoformat(),
-        "cached_fields": cached_fields
+        "cached_fields": dict(cached_fields)
     }
     
     return latest_weather
 
+@lru_cache(maxsize=256)
+def _age_string(count: int, unit: str) -> str:
+    """Return e.g. "1 day" or "5 minutes"; shared by every field with the same age."""
+    return f"{count} {unit}{'s' if count != 1 else ''}"
+
 def format_age_string(current_time: datetime, cached_time: datetime) -> str:
     """Format the age of cached data as a human-readable string.
     
@@ -314,10 +320,8 @@ def format_age_string(current_time: datetime, cached_time: datetime) -> str:
     """
     age_delta = current_time - cached_time
     if age_delta.days > 0:
-        return f"{age_delta.days} day{'s' if age_delta.days != 1 else ''}"
+        return _age_string(age_delta.days, "day")
     elif age_delta.seconds // 3600 > 0:
-        hours = age_delta.seconds // 3600
-        return f"{hours} hour{'s' if hours != 1 else ''}"
+        return _age_string(age_delta.seconds // 3600, "hour")
     else:
-        minutes = age_delta.seconds // 60
-        return f"{minutes} minute{'s' if minutes != 1 else ''}"
+        return _age_string(age_delta.seconds // 60, "minute")
@@ -6,8 +6,8 @@ import csv
 import sys
 import os
 
-# Add the parent directory to the path so we can import the file_processor module
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+# Add the current directory to path so we can import local modules
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from file_processor import process_csv_file
 
 def debug_csv():
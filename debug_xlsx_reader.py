@@ -7,14 +7,11 @@ import os
 import pandas as pd
 import logging
 
-# Add the parent directory to the path so we can import the file_processor module
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+# Add the current directory to path so we can import local modules
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from file_processor import process_xlsx_file, is_valid_email
 from config import logger
 
-# Set logger to DEBUG level
-logger.setLevel(logging.DEBUG)
-
 def debug_xlsx_test_file():
     """Debug the Excel test file creation and reading"""
     print("\n--- Creating test DataFrame ---")
@@ -75,4 +72,6 @@ def debug_xlsx_test_file():
     print(f"Manually found emails: {found_emails}")
 
 if __name__ == "__main__":
+    # Set logger to DEBUG level
+    logger.setLevel(logging.DEBUG)
     debug_xlsx_test_file()
@@ -281,8 +281,7 @@ async def force_cached_mode():
     data_cache.using_cached_data = True
     
     # Set all cached fields to true since we're using all cached data
-    for field in data_cache.cached_fields:
-        data_cache.cached_fields[field] = True
+    data_cache.cached_fields = dict.fromkeys(data_cache.cached_fields, True)
         
     logger.info("🔵 TEST MODE: Forced cached data display")
     
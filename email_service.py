@@ -1,5 +1,5 @@
 import os
-import boto3
+from functools import lru_cache
 from botocore.exceptions import ClientError
 from jinja2 import Environment, FileSystemLoader, select_autoescape
 
@@ -39,14 +39,30 @@ AWS_REGION = os.getenv('AWS_REGION')
 AWS_ACCESS_KEY_ID = os.getenv('AWS_ACCESS_KEY_ID')
 AWS_SECRET_ACCESS_KEY = os.getenv('AWS_SECRET_ACCESS_KEY')
 
-# Initialize the SES client
-# Boto3 will automatically use the environment variables if access_key_id and secret_access_key are None
-ses_client = boto3.client(
-    'ses',
-    region_name=AWS_REGION,
-    aws_access_key_id=AWS_ACCESS_KEY_ID,
-    aws_secret_access_key=AWS_SECRET_ACCESS_KEY
-)
+@lru_cache(maxsize=1)
+def get_ses_client():
+    """
+    Returns the shared SES client, creating it on first use.
+
+    boto3 is imported here rather than at module level so that importing this
+    module doesn't pay boto3's start-up cost until an email is actually sent.
+    """
+    import boto3
+    # Boto3 will automatically use the environment variables if access_key_id and secret_access_key are None
+    return boto3.client(
+        'ses',
+        region_name=AWS_REGION,
+        aws_access_key_id=AWS_ACCESS_KEY_ID,
+        aws_secret_access_key=AWS_SECRET_ACCESS_KEY
+    )
+
+def _get_ses_client_or_none():
+    """Returns the SES client, or None if it could not be created."""
+    try:
+        return get_ses_client()
+    except Exception as e:
+        print(f"Error initializing SES client: {e}")
+        return None
 
 # Function to send a generic email using SES
 def send_email(sender, recipients, subject, body_text, body_html=None):
@@ -65,6 +81,7 @@ def send_email(sender, recipients, subject, body_text, body_html=None):
     """
     CHARSET = "UTF-8"
 
+    ses_client = _get_ses_client_or_none()
     if not ses_client:
         print("Error: SES client not initialized.")
         return None
@@ -219,7 +236,7 @@ async def send_custom_email_to_subscribers(
     failure_count = 0
     errors_list = []
 
-    if not ses_client:
+    if not _get_ses_client_or_none():
         print("Error: SES client not initialized. Cannot send custom emails.")
         # Return failure for all recipients if SES client is not available
         for recipient in recipients:
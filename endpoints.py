@@ -6,7 +6,7 @@ import pathlib
 from datetime import datetime
 
 from config import logger, TIMEZONE
-from cache import data_cache
+from cache import data_cache, _WEATHER_KEYS
 from cache_refresh import refresh_data_cache
 from data_processing import format_age_string
 from admin_endpoints import admin_sessions # Import admin_sessions
@@ -57,32 +57,32 @@ async def fire_risk(
     
     # Handle stale data OR if wait_for_fresh is explicitly requested
     if wait_for_fresh or is_stale: # MODIFIED: Always enter this block if wait_for_fresh is true
-            # If requested to wait for fresh data, or if data is stale (critically or normally)
-            if wait_for_fresh or data_cache.is_critically_stale() or is_stale: # Ensure logic inside still makes sense
+            # Wait for a refresh if fresh data was requested or the data is critically
+            # stale; merely stale data is returned at once and refreshed in the background
+            if wait_for_fresh or data_cache.is_critically_stale():
                 logger.info(f"Condition for refresh met: wait_for_fresh={wait_for_fresh}, is_stale={is_stale}, critically_stale={data_cache.is_critically_stale()}")
                 
-                # If no refresh is in progress, start one
+                # If no refresh is in progress, run a forced one. It returns once the
+                # refresh has finished, with whether it succeeded.
                 if not refresh_in_progress:
                     logger.info("No refresh in progress, initiating a forced refresh")
-                    # Reset the update event and start a refresh
-                    data_cache.reset_update_event()
-                    refresh_started = await refresh_data_cache(
+                    success = await refresh_data_cache(
                         background_tasks, 
                         force=True,
                         session_token=session_token,
                         current_admin_sessions=admin_sessions
                     )
-                    logger.info(f"Forced refresh started: {refresh_started}")
+                    logger.info(f"Forced refresh completed with success={success}")
                 else:
                     logger.info("Refresh already in progress, waiting for it to complete")
-                
-                # Log cached field status before waiting
-                logger.info(f"Cached fields before wait: {data_cache.cached_fields}")
-                
-                # Wait for the update to complete with timeout
-                logger.info("Waiting for update event with timeout...")
-                success = await data_cache.wait_for_update()
-                logger.info(f"Wait for update completed with success={success}")
+                    # Log cached field status before waiting
+                    logger.info(f"Cached fields before wait: {data_cache.cached_fields}")
+                    
+                    # The update event is set when the refresh ends, failed or not, so
+                    # its outcome comes from last_update_success
+                    logger.info("Waiting for update event with timeout...")
+                    success = await data_cache.wait_for_update() and data_cache.last_update_success
+                    logger.info(f"Wait for update completed with success={success}")
 
                 # Log cached field status after waiting
                 logger.info(f"Cached fields after wait: {data_cache.cached_fields}")
@@ -100,7 +100,7 @@ async def fire_risk(
 
                 timed_out_waiting_for_fresh = False # Flag to track timeout specifically in wait_for_fresh path
                 if not success:
-                    logger.warning("⚠️ Timeout waiting for fresh data, returning potentially stale data")
+                    logger.warning("⚠️ No fresh data (refresh failed or timed out), returning potentially stale data")
                     logger.warning("This will trigger 'Refresh failed' in the UI")
                     timed_out_waiting_for_fresh = True # Set the flag
             else:
@@ -220,18 +220,9 @@ async def fire_risk(
                 target_weather = result["weather"]
                 cached_fields_map = data_cache.cached_fields # The flags set by cache_refresh
 
-                # Map internal cache field names to response field names
-                field_mapping = {
-                    "temperature": "air_temp",
-                    "humidity": "relative_humidity",
-                    "wind_speed": "wind_speed",
-                    "wind_gust": "wind_gust",
-                    "soil_moisture": "soil_moisture_15cm"
-                }
-
                 for cache_field_name, use_cached in cached_fields_map.items():
                     if use_cached:
-                        response_field_name = field_mapping.get(cache_field_name)
+                        response_field_name = _WEATHER_KEYS.get(cache_field_name)
                         # Check if the cached value exists in last_valid_data
                         if response_field_name and response_field_name in cached_weather:
                             cached_value = cached_weather.get(response_field_name)
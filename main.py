@@ -6,7 +6,7 @@ from contextlib import asynccontextmanager
 
 from config import IS_PRODUCTION, logger
 from cache import data_cache
-from cache_refresh import refresh_data_cache
+from cache_refresh import refresh_data_cache, wait_for_pending_alerts
 from endpoints import router as main_router
 from dev_endpoints import router as dev_router
 from admin_endpoints import router as admin_router
@@ -42,8 +42,10 @@ async def lifespan(app):
     # Yield control back to FastAPI during application lifetime
     yield
     
-    # Shutdown event (if needed in the future)
+    # Shutdown event
     logger.info("🛑 Application shutting down...")
+    # Don't drop alert emails that are still being sent
+    await wait_for_pending_alerts()
 
 # Initialize the FastAPI application
 app = FastAPI(lifespan=lifespan)
@@ -5,7 +5,6 @@ import os
 import json
 from datetime import datetime, timedelta
 from typing import Dict, Any, Optional, List
-import pytz
 from pathlib import Path
 
 from config import TIMEZONE, logger
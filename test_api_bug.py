@@ -3,19 +3,80 @@
 Test script to call the actual API and reproduce the red alert bug.
 """
 
+import argparse
+import asyncio
 import requests
+import httpx
 import json
 import sys
 
-def test_api_response():
-    """Test the actual API response to see what thresholds are being sent."""
+API_BASE_URL = "http://localhost:8000"
+
+# zstandard is optional - without it the debug dump is written as plain JSON
+try:
+    import zstandard as zstd
+except ImportError:
+    zstd = None
+
+def save_debug_response(data):
+    """Save the full API response for debugging and return the file path.
+
+    The dump is zstd-compressed (level 3) when zstandard is installed, which keeps
+    a growing corpus of near-identical responses small on disk.
+    """
+    payload = json.dumps(data, indent=2).encode("utf-8")
+    if zstd is not None:
+        path = "api_response_debug.json.zst"
+        payload = zstd.ZstdCompressor(level=3).compress(payload)
+    else:
+        path = "api_response_debug.json"
+    with open(path, "wb") as f:
+        f.write(payload)
+    return path
+
+def _http2_available():
+    """HTTP/2 in httpx needs the optional h2 package."""
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+async def _poll(client):
+    return await client.get("/fire-risk")
+
+async def poll_fire_risk(count):
+    """Fetch /fire-risk `count` times concurrently over one shared client.
+
+    With HTTP/2 the requests are multiplexed over a single connection; without
+    h2 installed (or against a server that only speaks HTTP/1.1) httpx falls
+    back to its HTTP/1.1 connection pool.
+    """
+    async with httpx.AsyncClient(base_url=API_BASE_URL, http2=_http2_available(), timeout=10) as client:
+        return await asyncio.gather(*[_poll(client) for _ in range(count)])
+
+def test_api_response(batch=None):
+    """Test the actual API response to see what thresholds are being sent.
+
+    If `batch` is given, the endpoint is polled that many times concurrently and
+    the last response is analysed.
+    """
     
     print("🌐 TESTING ACTUAL API RESPONSE")
     print("=" * 50)
     
     try:
         # Test the fire-risk endpoint
-        response = requests.get("http://localhost:8000/fire-risk", timeout=10)
+        if batch:
+            responses = asyncio.run(poll_fire_risk(batch))
+            print(f"📡 Polled /fire-risk {len(responses)} times ({responses[0].http_version})")
+            for i, polled in enumerate(responses, 1):
+                risk = polled.json().get("risk", "N/A") if polled.status_code == 200 else "N/A"
+                print(f"  Poll {i}: status {polled.status_code}, risk {risk}")
+            print()
+            response = responses[-1]
+        else:
+            response = requests.get(f"{API_BASE_URL}/fire-risk", timeout=10)
         
         if response.status_code == 200:
             data = response.json()
@@ -119,9 +180,8 @@ def test_api_response():
                             print("✅ Risk level matches threshold analysis")
             
             # Save full response for debugging
-            with open('api_response_debug.json', 'w') as f:
-                json.dump(data, f, indent=2)
-            print("💾 Full API response saved to api_response_debug.json")
+            debug_path = save_debug_response(data)
+            print(f"💾 Full API response saved to {debug_path}")
             
             return True
             
@@ -130,7 +190,7 @@ def test_api_response():
             print(f"Response: {response.text}")
             return False
             
-    except requests.exceptions.ConnectionError:
+    except (requests.exceptions.ConnectionError, httpx.ConnectError):
         print("❌ Could not connect to server. Make sure the server is running on localhost:8000")
         return False
     except Exception as e:
@@ -139,7 +199,12 @@ def test_api_response():
 
 def main():
     """Run the API test."""
-    success = test_api_response()
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batch", type=int, metavar="N",
+                        help="poll /fire-risk N times concurrently over one connection")
+    args = parser.parse_args()
+
+    success = test_api_response(batch=args.batch)
     
     if not success:
         print("\n💡 Make sure to start the server first:")
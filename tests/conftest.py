@@ -1,27 +1,34 @@
-import pytest
+import atexit
 import os
-import sys
+import shutil
+import tempfile
+
+# Tests write the disk cache to a temporary directory rather than the real
+# data/weather_cache.json, and under pytest-xdist every worker gets its own file
+# so workers don't overwrite each other's. DataCache joins WEATHER_CACHE_FILE to
+# data/, which an absolute path replaces. Must be set before config is imported.
+_cache_dir = tempfile.mkdtemp(prefix="fire-risk-tests-")
+atexit.register(shutil.rmtree, _cache_dir, ignore_errors=True)
+os.environ["WEATHER_CACHE_FILE"] = os.path.join(
+    _cache_dir, f"weather_cache_{os.getenv('PYTEST_XDIST_WORKER', 'main')}.json"
+)
+
+import pytest
+import pytest_asyncio
 import json
-from datetime import datetime, timedelta
-import pytz
-import socket
-import threading
-import time
+import copy
+import functools
 import asyncio
-import uvicorn
 import httpx # Replaced TestClient with httpx
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Optional
 from unittest.mock import patch, MagicMock, AsyncMock
 
-# Add the parent directory to sys.path to import the main module
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-
+# The repo root is put on sys.path once per session by pytest.ini's pythonpath
 from fire_risk_logic import calculate_fire_risk
 from api_clients import get_weather_data
 
-# Add the parent directory to sys.path to import the main module
-# Ensure this runs only once or handle potential multiple additions if conftest is loaded multiple times
-if os.path.abspath(os.path.join(os.path.dirname(__file__), '..')) not in sys.path:
-    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 # Import app from main, assuming main.py initializes the FastAPI app instance
 # If app is defined directly in endpoints.py, keep the original import
 try:
@@ -29,46 +36,31 @@ try:
 except ImportError:
     from endpoints import app # Fallback if app is directly in endpoints
 
-from cache import data_cache
-
-
-# --- Removed live_server_url fixture as it seems unused and may cause async conflicts ---
+from cache import data_cache, CircuitBreaker, DataCache
+import api_clients
+import cache_refresh
+from tests.mock_utils import noop
 
 
 # --- Existing Fixtures ---
 
 
-@pytest.fixture(scope="function")
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
 async def client():
     """Return an httpx.AsyncClient for the FastAPI app."""
-    # Use httpx.AsyncClient for async testing with function scope to match event_loop fixture
-    async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+    # One client for the whole session - the ASGI transport is set up once and
+    # closed at session teardown, on the session event loop set in pytest.ini
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
         yield client
     
-@pytest.fixture(scope="function")
-def event_loop():
-    """Create an event loop for each test."""
-    # Create a new loop for each test
-    policy = asyncio.get_event_loop_policy()
-    loop = policy.new_event_loop()
-    asyncio.set_event_loop(loop)
-    yield loop
-    # Close the loop after the test is done
-    if not loop.is_closed():
-        loop.close()
-
 @pytest.fixture
 def reset_cache(): # Reverted fixture to sync
     """Reset the data cache before and after each test."""
-    # Store original cache state
-    original_cache = {
-        "synoptic_data": data_cache.synoptic_data,
-        "wunderground_data": data_cache.wunderground_data,
-        "fire_risk_data": data_cache.fire_risk_data,
-        "last_updated": data_cache.last_updated,
-        "last_valid_data": data_cache.last_valid_data.copy(),
-        "cached_fields": data_cache.cached_fields.copy(),
-        "using_cached_data": data_cache.using_cached_data
+    # Snapshot the whole cache state. Private attributes (the lock and the update
+    # event) can't be deep-copied and are restored as the same objects.
+    original_state = {
+        name: value if name.startswith("_") else copy.deepcopy(value)
+        for name, value in vars(data_cache).items()
     }
     
     # Reset cache for test
@@ -77,23 +69,21 @@ def reset_cache(): # Reverted fixture to sync
     data_cache.fire_risk_data = None
     data_cache.last_updated = None
     data_cache.using_cached_data = False
-    for field in data_cache.cached_fields:
-        data_cache.cached_fields[field] = False
+    data_cache.cached_mask = 0
+    data_cache.circuit = CircuitBreaker()
     
     yield
     
-    # Restore original cache state
-    data_cache.synoptic_data = original_cache["synoptic_data"]
-    data_cache.wunderground_data = original_cache["wunderground_data"]
-    data_cache.fire_risk_data = original_cache["fire_risk_data"]
-    data_cache.last_updated = original_cache["last_updated"]
-    data_cache.last_valid_data = original_cache["last_valid_data"]
-    data_cache.cached_fields = original_cache["cached_fields"]
-    data_cache.using_cached_data = original_cache["using_cached_data"]
-
-@pytest.fixture # Reverted scope to function
+    # Restore original cache state, dropping anything the test added
+    vars(data_cache).clear()
+    vars(data_cache).update(original_state)
+
+@pytest.fixture(scope="session")
 def mock_synoptic_response():
-    """Return a mock Synoptic API response."""
+    """Return a mock Synoptic API response.
+
+    Shared across the session - deep copy it before mutating.
+    """
     return {
         "STATION": [
             {
@@ -113,21 +103,13 @@ def mock_synoptic_response():
         ]
     }
 
-@pytest.fixture # Reverted scope to function
-def mock_wunderground_response():
-    """Return a mock Weather Underground API response."""
-    return {
-        "observations": [
-            {
-                "imperial": {
-                    "windGust": 3.0
-                }
-            }
-        ]
-    }
 
-# Define test station IDs (since WUNDERGROUND_STATION_IDS was removed from config.py)
-TEST_STATION_IDS = ["KCASIERR68", "KCASIERR63", "KCASIERR72"] 
+@pytest.fixture(scope="session", autouse=True)
+def no_fallback_data_write():
+    """Keep successful API calls from overwriting the tracked data/synoptic_fallback_data.json."""
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(api_clients, "save_fallback_data", lambda data: True)
+        yield
 
 
 # --- Fixture using patch to mock API calls within cache_refresh ---
@@ -135,9 +117,14 @@ TEST_STATION_IDS = ["KCASIERR68", "KCASIERR63", "KCASIERR72"]
 @pytest.fixture
 def mock_api_responses(mock_synoptic_response):
     """Mock API responses by patching the functions called by cache_refresh."""
-    # Patch only the Synoptic data function
-    with patch('cache_refresh.get_synoptic_data', return_value=mock_synoptic_response):
+    # Patch only the Synoptic data function. Plain attribute swaps are much
+    # cheaper than building patch() objects for every test.
+    original = cache_refresh.get_synoptic_data
+    cache_refresh.get_synoptic_data = lambda *args, **kwargs: mock_synoptic_response
+    try:
         yield
+    finally:
+        cache_refresh.get_synoptic_data = original
 
 
 # --- Fixtures for specific failure scenarios ---
@@ -145,25 +132,48 @@ def mock_api_responses(mock_synoptic_response):
 @pytest.fixture
 def mock_failed_synoptic_api():
     """Mock a failed Synoptic API response."""
-    with patch('api_clients.get_weather_data', return_value=None):
-        yield
-
-@pytest.fixture
-def mock_failed_wunderground_api():
-    """Mock a failed Weather Underground API response."""
-    with patch('tests.mock_utils.get_wunderground_data', return_value=None):
+    original = api_clients.get_weather_data
+    api_clients.get_weather_data = lambda *args, **kwargs: None
+    try:
         yield
+    finally:
+        api_clients.get_weather_data = original
 
 @pytest.fixture
-def mock_partial_api_failure(mock_synoptic_response):
+def mock_partial_api_failure():
     """Mock a partial API failure where some fields are missing."""
-    # Create a copy of the mock response with some fields set to None
-    partial_response = mock_synoptic_response.copy()
-    partial_response["STATION"][0]["OBSERVATIONS"]["air_temp_value_1"]["value"] = None
-    partial_response["STATION"][1]["OBSERVATIONS"]["soil_moisture_value_1"]["value"] = None
+    # Same shape as mock_synoptic_response with temperature and soil moisture
+    # missing. Built fresh so nothing is shared with the session-scoped fixture.
+    partial_response = {
+        "STATION": [
+            {
+                "STID": "SEYC1",
+                "OBSERVATIONS": {
+                    "air_temp_value_1": {"value": None},
+                    "relative_humidity_value_1": {"value": 98.0},
+                    "wind_speed_value_1": {"value": 0.0}
+                }
+            },
+            {
+                "STID": "C3DLA",
+                "OBSERVATIONS": {
+                    "soil_moisture_value_1": {"value": None}
+                }
+            }
+        ]
+    }
     
-    with patch('api_clients.get_weather_data', return_value=partial_response):
+    original = api_clients.get_weather_data
+    api_clients.get_weather_data = lambda *args, **kwargs: partial_response
+    try:
         yield
+    finally:
+        api_clients.get_weather_data = original
+
+@pytest.fixture(autouse=True)
+def clear_subscribers_cache(monkeypatch):
+    """Start every test without cached subscribers, so patched lookups are always called."""
+    monkeypatch.setattr(cache_refresh, "_subscribers_cache", None)
 
 @pytest.fixture
 def mock_refresh_data_cache():
@@ -172,46 +182,78 @@ def mock_refresh_data_cache():
         mock_func.return_value = True
         yield mock_func
 
+# When the fake cache's data was last valid: older than any stale_ttl, so
+# unforced refreshes of a FakeDataCache fetch instead of serving cached data
+FAKE_CACHED_AT = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+def _fake_last_valid_data():
+    """Build last_valid_data shaped like DataCache's, every field at its default value."""
+    fields = {name: {"value": value, "timestamp": FAKE_CACHED_AT} for name, value in DataCache.DEFAULT_VALUES.items()}
+    fields["wind_gust"]["stations"] = {}
+    return {
+        "fields": fields,
+        "synoptic_data": None,
+        "wunderground_data": None,
+        "fire_risk_data": None,
+        "timestamp": FAKE_CACHED_AT,
+    }
+
+@dataclass(slots=True)
+class FakeDataCache:
+    """Lightweight stand-in for DataCache with the attributes cache_refresh uses.
+
+    State is plain attributes and methods are mocks, so tests can assert on
+    calls. Slots make setting an attribute that isn't declared here an error.
+    """
+    update_in_progress: bool = False
+    refresh_task_active: bool = False
+    max_retries: int = 3
+    update_timeout: float = 10
+    retry_delay: float = 5
+    max_retry_delay: float = 60
+    fresh_ttl: float = 60
+    stale_ttl: float = 600
+    background_refresh_interval: int = 10
+    circuit: CircuitBreaker = field(default_factory=CircuitBreaker)
+    fire_risk_data: Optional[Dict[str, Any]] = None
+    last_valid_data: Optional[Dict[str, Any]] = field(default_factory=_fake_last_valid_data)
+    # Every field not cached, like a freshly refreshed DataCache
+    cached_fields: Dict[str, Any] = field(default_factory=lambda: dict.fromkeys(DataCache.DEFAULT_VALUES, False))
+    using_cached_data: bool = False
+    last_update_success: bool = False
+    previous_risk_level: Optional[str] = None
+    risk_level_timestamp: Optional[datetime] = None
+    last_alerted_timestamp: Optional[datetime] = None
+    last_email_send_outcome: Optional[str] = None
+    _update_complete_event: asyncio.Event = field(default_factory=asyncio.Event)
+    update_cache: MagicMock = field(default_factory=MagicMock)
+    ensure_complete_weather_data: MagicMock = field(default_factory=MagicMock)
+    # No alert unless a test asks for one
+    should_send_alert_for_transition: MagicMock = field(default_factory=lambda: MagicMock(return_value=False))
+    record_alert_sent: MagicMock = field(default_factory=MagicMock)
+    update_risk_level: MagicMock = field(default_factory=MagicMock)
+    set_update_event: MagicMock = field(default_factory=MagicMock)
+    wait_for_update: AsyncMock = field(default_factory=AsyncMock)
+    reset_update_event: Callable[..., None] = noop
+
+@pytest.fixture(scope="session")
+def mock_cache_factory():
+    """Return FakeDataCache, so only per-test differences are passed as keyword arguments."""
+    return FakeDataCache
+
 @pytest.fixture
 def mock_get():
-    """Mock the requests.get function for tests."""
-    with patch('requests.get') as mock_func:
+    """Mock the shared API session's get method for tests."""
+    with patch.object(api_clients._SESSION, 'get') as mock_func:
         mock_response = MagicMock()
         mock_response.status_code = 200
         mock_response.json.return_value = {"success": True, "data": {"token": "test_token"}}
         mock_func.return_value = mock_response
         yield mock_func
 
-# Mock implementation of get_wunderground_data for tests
-def get_wunderground_data(station_id=None):
-    """Mock function for the removed get_wunderground_data API client function."""
+def _baseline_weather_data():
+    """Return a fresh copy of the weather data used to populate the cache."""
     return {
-        "observations": [
-            {
-                "imperial": {
-                    "windGust": 3.0
-                }
-            }
-        ]
-    }
-
-@pytest.fixture
-def live_server_url():
-    """Mock live_server_url for e2e tests instead of launching a server."""
-    # Start a simple HTTP server in a separate thread for testing
-    # This replaces the pytest-fastapi live_server which is causing issues
-    port = 8000
-    url = f"http://localhost:{port}"
-    
-    # Return the URL without actually starting a server for now
-    # Tests can be updated to work with this mock URL
-    yield url
-
-@pytest.fixture
-def populate_cache_with_valid_data(mock_synoptic_response, mock_wunderground_response):
-    """Populate the cache with valid data."""
-    # Create a fire risk data object
-    weather_data = {
         "air_temp": 0.5,
         "relative_humidity": 98.0,
         "wind_speed": 0.0,
@@ -230,13 +272,20 @@ def populate_cache_with_valid_data(mock_synoptic_response, mock_wunderground_res
             "wind_gust": False
         }
     }
-    
-    risk, explanation = calculate_fire_risk(weather_data)
-    fire_risk_data = {"risk": risk, "explanation": explanation, "weather": weather_data}
-    
-    # Update the cache
-    pacific_tz = pytz.timezone('America/Los_Angeles')
-    current_time = datetime.now(pacific_tz)
+
+@functools.lru_cache(maxsize=1)
+def _baseline_fire_risk():
+    """Compute the risk level and explanation for the baseline weather once."""
+    risk, explanation, _ = calculate_fire_risk(_baseline_weather_data())
+    return risk, explanation
+
+@pytest.fixture
+def populate_cache_with_valid_data(mock_synoptic_response):
+    """Populate the cache with valid data."""
+    # Create a fire risk data object. update_cache mutates it, so only the
+    # risk calculation is shared between tests.
+    risk, explanation = _baseline_fire_risk()
+    fire_risk_data = {"risk": risk, "explanation": explanation, "weather": _baseline_weather_data()}
     
     # Modified to match the new update_cache signature (removed wunderground_data parameter)
     data_cache.update_cache(mock_synoptic_response, fire_risk_data)
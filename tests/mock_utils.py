@@ -1,5 +1,11 @@
 """Mock utility functions for testing."""
 
+from datetime import datetime, timedelta, timezone
+from types import MappingProxyType
+
+# Test station IDs (since WUNDERGROUND_STATION_IDS was removed from config.py)
+TEST_STATION_IDS = ["KCASIERR68", "KCASIERR63", "KCASIERR72"]
+
 def get_wunderground_data(station_id=None):
     """Mock function for the removed get_wunderground_data API client function."""
     return {
@@ -11,3 +17,63 @@ def get_wunderground_data(station_id=None):
             }
         ]
     }
+
+def noop(*args, **kwargs):
+    """Stand-in for mocked methods whose calls no test inspects, e.g. reset_update_event."""
+    return None
+
+
+# Attributes refresh_data_cache reads from a patched cache_refresh.data_cache.
+# Read-only; configure_refresh_cache builds the mutable values per call.
+REFRESH_CACHE_ATTRS = MappingProxyType({
+    "update_in_progress": False,
+    "max_retries": 5,
+    "retry_delay": 0,
+    "max_retry_delay": 60,
+    "update_timeout": 15,
+    "fresh_ttl": 60,
+    "stale_ttl": 600,
+    "refresh_task_active": False,
+    "using_cached_data": False,
+    "reset_update_event": noop,
+})
+
+# Weather that ensure_complete_weather_data returns for a Red risk refresh
+RED_RISK_WEATHER = MappingProxyType({
+    "air_temp": 32,
+    "relative_humidity": 12,
+    "wind_speed": 25,
+    "wind_gust": 35,
+    "soil_moisture_15cm": 8
+})
+
+# calculate_fire_risk's result for RED_RISK_WEATHER: risk, explanation and the
+# values it evaluated, in the display units the alert email uses
+RED_RISK_RESULT = ("Red", "High temperature and low humidity", MappingProxyType({
+    "temperature": 89.6,
+    "humidity": 12,
+    "wind_speed": 25,
+    "wind_gust": 35,
+    "soil_moisture": 8
+}))
+
+def configure_refresh_cache(mock_cache, **overrides):
+    """Set up a data_cache MagicMock for refresh_data_cache in one configure_mock call.
+
+    The cached data is an hour old, past stale_ttl, so the refresh fetches.
+    """
+    cached_at = datetime.now(timezone.utc) - timedelta(hours=1)
+    fields = ("temperature", "humidity", "wind_speed", "soil_moisture", "wind_gust")
+    mock_cache.configure_mock(**{
+        **REFRESH_CACHE_ATTRS,
+        "cached_fields": dict.fromkeys(fields, False),
+        "last_valid_data": {
+            "fields": {name: {"value": None, "timestamp": cached_at} for name in fields},
+            "timestamp": cached_at,
+        },
+        "ensure_complete_weather_data.return_value": dict(RED_RISK_WEATHER),
+        # A closed circuit breaker, so the refresh calls the (patched) API
+        "circuit.is_open.return_value": False,
+        **overrides,
+    })
+    return mock_cache
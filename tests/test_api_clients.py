@@ -1,79 +1,106 @@
 import pytest
 import requests
 from unittest.mock import patch, MagicMock
+import api_clients
 from api_clients import get_api_token, get_weather_data, get_synoptic_data
 
 # Mock API responses
 mock_token_response = {"TOKEN": "mock_token"}
 mock_weather_response = {"STATION": []}
 
-@patch('api_clients.requests.get')
-def test_get_api_token_success(mock_get):
+# Expected request URLs, built once
+_SYNOPTIC_STATIONS_URL = f"{api_clients.SYNOPTIC_BASE_URL}/stations/latest?stid=mock_location&token=mock_token"
+
+# Response objects shared by every test; tests only pick which one session.get returns
+_TOKEN_OK = MagicMock(status_code=200)
+_TOKEN_OK.json.return_value = mock_token_response
+_WEATHER_OK = MagicMock(status_code=200)
+_WEATHER_OK.json.return_value = mock_weather_response
+_BAD_REQUEST = MagicMock(status_code=400)
+_BAD_REQUEST.json.return_value = {"error": "Bad request"}
+_BAD_REQUEST.raise_for_status.side_effect = requests.exceptions.HTTPError("400 Error")
+_UNAUTHORIZED = MagicMock(status_code=401)
+_UNAUTHORIZED.json.return_value = {"error": "Unauthorized"}
+
+
+@pytest.fixture(scope="module", autouse=True)
+def _patched_requests_get():
+    """Replace the shared session's get once for the whole module."""
+    with patch.object(api_clients._SESSION, 'get') as mock_session_get:
+        yield mock_session_get
+
+
+@pytest.fixture(scope="module", autouse=True)
+def _fake_token():
+    """Make get_weather_data see a valid token without calling the token endpoint.
+
+    The token tests call the get_api_token imported above, so they still hit
+    the real function.
+    """
+    original = api_clients.get_api_token
+    api_clients.get_api_token = lambda *args, **kwargs: "mock_token"
+    try:
+        yield
+    finally:
+        api_clients.get_api_token = original
+
+
+@pytest.fixture
+def requests_get(_patched_requests_get):
+    """Return the module's session.get mock, cleared of any previous test's setup."""
+    _patched_requests_get.reset_mock(return_value=True, side_effect=True)
+    return _patched_requests_get
+
+def test_get_api_token_success(requests_get):
     """Test successful API token retrieval."""
-    mock_get.return_value.json.return_value = mock_token_response
-    mock_get.return_value.status_code = 200
+    requests_get.return_value = _TOKEN_OK
     token = get_api_token()
     assert token == "mock_token"
 
 
-@patch('api_clients.requests.get')
-def test_get_api_token_failure(mock_get):
+def test_get_api_token_failure(requests_get):
     """Test failed API token retrieval."""
-    mock_get.return_value.status_code = 400  # Simulate a bad request
-    # Properly mock the json method to return a dict instead of a MagicMock
-    mock_get.return_value.json.return_value = {"error": "Bad request"}
-    # Configure raise_for_status to raise an exception
-    mock_get.return_value.raise_for_status.side_effect = requests.exceptions.HTTPError("400 Error")
+    requests_get.return_value = _BAD_REQUEST  # Simulate a bad request
     token = get_api_token()
     assert token is None
 
 
-@patch('api_clients.get_api_token')
-@patch('api_clients.requests.get')
-def test_get_weather_data_success(mock_get, mock_token):
+def test_get_weather_data_success(requests_get):
     """Test successful weather data retrieval."""
-    mock_token.return_value = "mock_token"
-    mock_get.return_value.json.return_value = mock_weather_response
-    mock_get.return_value.status_code = 200
+    requests_get.return_value = _WEATHER_OK
     data = get_weather_data("mock_location")
     assert data == mock_weather_response
+    requests_get.assert_called_once()
+    assert requests_get.call_args.args[0] == _SYNOPTIC_STATIONS_URL
 
 
-@patch('api_clients.get_api_token')
-@patch('api_clients.requests.get')
-def test_get_weather_data_failure(mock_get, mock_token):
+def test_get_weather_data_failure(requests_get):
     """Test failed weather data retrieval."""
-    mock_token.return_value = "mock_token"
-    mock_get.return_value.status_code = 400
-    # Also need to properly mock the json method to avoid MagicMock being returned
-    mock_get.return_value.json.return_value = {"error": "Bad request"}
-    # Configure raise_for_status to raise an exception
-    mock_get.return_value.raise_for_status.side_effect = requests.exceptions.HTTPError("400 Error")
+    requests_get.return_value = _BAD_REQUEST
     
     data = get_weather_data("mock_location")
     assert data is None
 
 
-@patch('api_clients.get_api_token')
-@patch('api_clients.requests.get')
-def test_get_weather_data_retry(mock_get, mock_token):
+def test_get_weather_data_retry(requests_get):
     """Test weather data retrieval with retry."""
-    mock_token.return_value = "mock_token"
-    responses = [MagicMock(status_code=401),  # First call fails with 401
-                 MagicMock(status_code=200, json=lambda: mock_weather_response)]
-    mock_get.side_effect = responses
+    requests_get.side_effect = [_UNAUTHORIZED,  # First call fails with 401
+                                _WEATHER_OK]
     data = get_weather_data("mock_location")
     assert data == mock_weather_response
 
 
-@patch('api_clients.get_api_token')
-@patch('api_clients.requests.get')
-def test_get_weather_data_max_retries(mock_get, mock_token):
-    """Test weather data retrieval exceeding max retries."""
-    mock_token.return_value = "mock_token"
-    mock_get.return_value.status_code = 401
+@pytest.mark.slow
+@patch('api_clients.load_fallback_data')
+def test_get_weather_data_max_retries(mock_load_fallback_data, requests_get):
+    """Test weather data retrieval exceeding max retries falls back to the saved data."""
+    requests_get.return_value = _UNAUTHORIZED
+    mock_load_fallback_data.return_value = mock_weather_response
     data = get_weather_data("mock_location")
-    assert data is None
+    assert data == mock_weather_response
+    # The first call plus max_retries (4) retries, backing off between them
+    assert requests_get.call_count == 5
+    mock_load_fallback_data.assert_called_once_with()
 
 
 @patch('api_clients.get_weather_data')
@@ -83,3 +110,14 @@ def test_get_synoptic_data(mock_get_weather_data):
     mock_get_weather_data.return_value = mock_weather_response
     data = get_synoptic_data()
     assert data == mock_weather_response
+
+
+def test_session_honours_capped_retry_after():
+    """The session retries 429s and waits for Retry-After, up to MAX_RETRY_AFTER."""
+    retries = api_clients._create_session().get_adapter("https://").max_retries
+    assert 429 in retries.status_forcelist
+    assert retries.is_retry("GET", 429, has_retry_after=True)
+    assert retries.get_retry_after(MagicMock(headers={"Retry-After": "3"})) == 3
+    assert retries.get_retry_after(MagicMock(headers={"Retry-After": "120"})) == api_clients.MAX_RETRY_AFTER
+    # Each retry is a new Retry object of the same class, so the cap holds on later attempts
+    assert type(retries.new()) is type(retries)
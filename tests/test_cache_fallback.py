@@ -1,19 +1,43 @@
 import pytest
-import asyncio
-from unittest.mock import patch, MagicMock
-from datetime import datetime, timedelta
+import copy
+from datetime import datetime
+from types import MappingProxyType
 
-from cache import DataCache
+from cache import DataCache, _FIELD_MAP
 from config import TIMEZONE
 
+FIELDS = tuple(field for field, _ in _FIELD_MAP)
+_ALL_CACHED = dict.fromkeys(FIELDS, True)
+_NONE_CACHED = dict.fromkeys(FIELDS, False)
+# Fixed timestamp for cached values; no assertion depends on the wall clock.
+# localize() rather than tzinfo= so pytz picks PST instead of LMT.
+FIXED_NOW = TIMEZONE.localize(datetime(2024, 1, 1, 12, 0))
+# DataCache.DEFAULT_VALUES as the ensure_complete_weather_data tests expect them
+TEST_DEFAULT_VALUES = {
+    "temperature": 15.0,
+    "humidity": 40.0,
+    "wind_speed": 5.0,
+    "soil_moisture": 20.0,
+    "wind_gust": 8.0
+}
 
-@pytest.fixture
-def sample_data_cache():
-    """Create a test instance of DataCache with default values."""
+
+@pytest.fixture(scope="module")
+def _cache_template():
+    """Create one DataCache for the module, plus a pristine copy of its last_valid_data."""
     cache = DataCache()
+    return cache, copy.deepcopy(cache.last_valid_data)
+
+
+@pytest.fixture
+def sample_data_cache(_cache_template):
+    """Return the module's DataCache, reset to default values."""
+    cache, pristine_last_valid_data = _cache_template
     # Ensure all fields are marked as using cached data for testing
-    cache.cached_fields = {field: True for field in ["temperature", "humidity", "wind_speed", "soil_moisture", "wind_gust"]}
+    cache.cached_fields = _ALL_CACHED.copy()
     cache.using_cached_data = True
+    cache.fire_risk_data = None
+    cache.last_valid_data = copy.deepcopy(pristine_last_valid_data)
     return cache
 
 
@@ -31,83 +55,82 @@ def test_cache_init_default_values(sample_data_cache):
     assert sample_data_cache.last_valid_data["timestamp"] is not None
     
     # Check that we start with all fields marked as using cached values
-    assert all(sample_data_cache.cached_fields.values())
+    assert sample_data_cache.cached_fields == _ALL_CACHED
     assert sample_data_cache.using_cached_data is True
 
 
-def test_get_field_value_direct(sample_data_cache):
+# (internal field name, fire_risk_data["weather"] key, test value)
+FIELD_CASES = [
+    ("temperature", "air_temp", 20.0),
+    ("humidity", "relative_humidity", 60.0),
+    ("wind_speed", "wind_speed", 10.0),
+    ("soil_moisture", "soil_moisture_15cm", 30.0),
+    ("wind_gust", "wind_gust", 15.0),
+]
+# fire_risk_data holding a direct value for every field. get_field_value only
+# reads it, so the tests share one read-only instance.
+_DIRECT_WEATHER = MappingProxyType(
+    {"weather": MappingProxyType({src_key: value for _, src_key, value in FIELD_CASES})}
+)
+
+
+@pytest.mark.parametrize("field,src_key,value", FIELD_CASES)
+def test_get_field_value_direct(sample_data_cache, field, src_key, value):
     """Test that get_field_value returns direct values from fire_risk_data if available."""
-    # Setup mock fire_risk_data with direct values
-    sample_data_cache.fire_risk_data = {
-        "weather": {
-            "air_temp": 20.0,
-            "relative_humidity": 60.0,
-            "wind_speed": 10.0,
-            "soil_moisture_15cm": 30.0,
-            "wind_gust": 15.0
-        }
-    }
+    # Setup mock fire_risk_data with direct values; only this field starts out cached
+    sample_data_cache.fire_risk_data = _DIRECT_WEATHER
+    sample_data_cache.cached_fields = {field: True}
     
-    # Test each field
-    assert sample_data_cache.get_field_value("temperature") == 20.0
-    assert sample_data_cache.get_field_value("humidity") == 60.0
-    assert sample_data_cache.get_field_value("wind_speed") == 10.0
-    assert sample_data_cache.get_field_value("soil_moisture") == 30.0
-    assert sample_data_cache.get_field_value("wind_gust") == 15.0
+    assert sample_data_cache.get_field_value(field) == value
     
-    # Verify no cached flags are set since we're using direct values
-    assert not any(sample_data_cache.cached_fields.values())
+    # Verify no cached flags are set since we're using the direct value
+    assert sample_data_cache.cached_fields == _NONE_CACHED
     assert not sample_data_cache.using_cached_data
 
 
-def test_get_field_value_cached(sample_data_cache):
+@pytest.mark.parametrize("field,src_key,value", FIELD_CASES)
+def test_get_field_value_cached(sample_data_cache, field, src_key, value):
     """Test that get_field_value returns cached values when direct values are not available."""
     # Setup empty fire_risk_data
     sample_data_cache.fire_risk_data = {"weather": {}}
     
-    # Setup custom cached values
-    current_time = datetime.now(TIMEZONE)
-    sample_data_cache.last_valid_data["fields"]["temperature"]["value"] = 25.0
-    sample_data_cache.last_valid_data["fields"]["temperature"]["timestamp"] = current_time
+    # Setup custom cached value
+    current_time = FIXED_NOW
+    sample_data_cache.last_valid_data["fields"][field]["value"] = value
+    sample_data_cache.last_valid_data["fields"][field]["timestamp"] = current_time
     
     # Get value - should use cached value
-    assert sample_data_cache.get_field_value("temperature") == 25.0
+    assert sample_data_cache.get_field_value(field) == value
     
     # Verify cache flags are set
-    assert sample_data_cache.cached_fields["temperature"] is True
+    assert sample_data_cache.cached_fields[field] is True
     assert sample_data_cache.using_cached_data is True
 
 
-def test_get_field_value_default(sample_data_cache):
+@pytest.mark.parametrize("field,src_key,value", FIELD_CASES)
+def test_get_field_value_default(sample_data_cache, field, src_key, value):
     """Test that get_field_value returns default values when neither direct nor cached values are available."""
     # Setup empty fire_risk_data
     sample_data_cache.fire_risk_data = {"weather": {}}
     
-    # Clear cached values
-    sample_data_cache.last_valid_data["fields"]["temperature"]["value"] = None
+    # Clear cached value
+    sample_data_cache.last_valid_data["fields"][field]["value"] = None
     
     # Get value - should use default value
-    assert sample_data_cache.get_field_value("temperature") == sample_data_cache.DEFAULT_VALUES["temperature"]
+    assert sample_data_cache.get_field_value(field) == sample_data_cache.DEFAULT_VALUES[field]
     
     # Verify cache flags are set
-    assert sample_data_cache.cached_fields["temperature"] is True
+    assert sample_data_cache.cached_fields[field] is True
     assert sample_data_cache.using_cached_data is True
 
 
-def test_ensure_complete_weather_data(sample_data_cache):
+def test_ensure_complete_weather_data(sample_data_cache, monkeypatch):
     """Test that ensure_complete_weather_data fills in missing fields with cached or default values."""
     # Set up default values to match test expectations
-    original_defaults = sample_data_cache.DEFAULT_VALUES.copy()
-    sample_data_cache.DEFAULT_VALUES = {
-        "temperature": 15.0,
-        "humidity": 40.0,
-        "wind_speed": 5.0,
-        "soil_moisture": 20.0,
-        "wind_gust": 8.0
-    }
+    monkeypatch.setattr(DataCache, "DEFAULT_VALUES", TEST_DEFAULT_VALUES)
     
     # Set up cached values
-    current_time = datetime.now(TIMEZONE)
+    current_time = FIXED_NOW
     sample_data_cache.last_valid_data["fields"]["humidity"]["value"] = 55.0
     sample_data_cache.last_valid_data["fields"]["humidity"]["timestamp"] = current_time
     sample_data_cache.last_valid_data["fields"]["wind_speed"]["value"] = 5.0
@@ -133,42 +156,23 @@ def test_ensure_complete_weather_data(sample_data_cache):
     assert completed_weather["wind_speed"] == 5.0          # Used cached value
     assert completed_weather["soil_moisture_15cm"] == 30.0 # Original value preserved
     assert completed_weather["wind_gust"] == 8.0           # Used cached value
-    
-    # Restore original defaults
-    sample_data_cache.DEFAULT_VALUES = original_defaults
 
 
-def test_complete_weather_data_never_returns_none(sample_data_cache):
+def test_complete_weather_data_never_returns_none(sample_data_cache, monkeypatch):
     """Test that ensure_complete_weather_data never returns None for any weather metric."""
     # Patch DEFAULT_VALUES to ensure consistent test results
-    original_defaults = sample_data_cache.DEFAULT_VALUES.copy()
-    
-    try:
-        # Setup DEFAULT_VALUES with specific test values
-        sample_data_cache.DEFAULT_VALUES = {
-            "temperature": 15.0,
-            "humidity": 40.0,
-            "wind_speed": 5.0,
-            "soil_moisture": 20.0,
-            "wind_gust": 8.0
-        }
-        
-        # Setup completely empty weather data
-        empty_weather = {}
-        
-        # Complete the weather data
-        completed_weather = sample_data_cache.ensure_complete_weather_data(empty_weather, use_default_if_missing=True)
-        
-        # Verify that no values are None
-        assert completed_weather["air_temp"] is not None
-        assert completed_weather["relative_humidity"] is not None
-        assert completed_weather["wind_speed"] is not None
-        assert completed_weather["soil_moisture_15cm"] is not None
-        assert completed_weather["wind_gust"] is not None
-        
-        # Verify all cache flags are set
-        assert all(sample_data_cache.cached_fields.values())
-        assert sample_data_cache.using_cached_data is True
-    finally:
-        # Restore original defaults
-        sample_data_cache.DEFAULT_VALUES = original_defaults
+    monkeypatch.setattr(DataCache, "DEFAULT_VALUES", TEST_DEFAULT_VALUES)
+    
+    # Setup completely empty weather data
+    empty_weather = {}
+    
+    # Complete the weather data
+    completed_weather = sample_data_cache.ensure_complete_weather_data(empty_weather, use_default_if_missing=True)
+    
+    # Verify that no values are None
+    for _, wkey in _FIELD_MAP:
+        assert completed_weather[wkey] is not None
+    
+    # Verify all cache flags are set
+    assert sample_data_cache.cached_fields == _ALL_CACHED
+    assert sample_data_cache.using_cached_data is True
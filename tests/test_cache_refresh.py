@@ -1,20 +1,51 @@
 import pytest
 import asyncio
-from unittest.mock import patch, MagicMock, AsyncMock
+import itertools
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional
+from unittest.mock import MagicMock, AsyncMock
 from datetime import datetime, timedelta, timezone
+from types import MappingProxyType, MethodType
+import cache_refresh
 from cache_refresh import refresh_data_cache, schedule_next_refresh
-from cache import DataCache
+from cache import DataCache, CircuitBreaker
 from api_clients import get_synoptic_data
-# Mock for the removed get_wunderground_data function
-from tests.conftest import get_wunderground_data
 from data_processing import combine_weather_data
 from fire_risk_logic import calculate_fire_risk
 # Import mocks for email/subscriber services
 from unittest.mock import call
 
 
-@pytest.fixture
+# The real asyncio.sleep, for tests that need backoffs to actually wait
+_real_sleep = asyncio.sleep
+
+
+@pytest.fixture(autouse=True)
+def no_sleep(monkeypatch):
+    """Replace asyncio.sleep for every test so no retry backoff sleeps for real."""
+    mock_sleep = AsyncMock()
+    monkeypatch.setattr(cache_refresh.asyncio, "sleep", mock_sleep)
+    return mock_sleep
+
+
+@pytest.fixture(scope="module")
+def frozen_now():
+    """One fixed 'now' for the cached timestamps in this module."""
+    return datetime.now(timezone.utc)
+
+
+@pytest.fixture(scope="module")
+def past_20m(frozen_now):
+    """Timestamp for cached data 20 minutes older than frozen_now, past stale_ttl."""
+    return frozen_now - timedelta(minutes=20)
+
+
+@pytest.fixture(scope="module")
 def mock_data():
+    """Weather, combined and risk data shared by the module's tests - don't mutate."""
     mock_weather_data = {"STATION": []}
     mock_wunderground_data = {"observations": []}
     mock_combined_data = {"air_temp": 25, "relative_humidity": 50, "wind_speed": 10, "soil_moisture_15cm": 20, "wind_gust": 15}
@@ -22,479 +53,551 @@ def mock_data():
     return mock_weather_data, mock_wunderground_data, mock_combined_data, mock_fire_risk
 
 
-@pytest.mark.asyncio
-@patch('cache_refresh.get_synoptic_data')
-@patch('cache_refresh.get_wunderground_data')
-@patch('cache_refresh.combine_weather_data')
-@patch('cache_refresh.calculate_fire_risk')
-async def test_refresh_data_cache_success(mock_calculate_fire_risk, mock_combine_weather_data, mock_get_wunderground_data, mock_get_synoptic_data, mock_data):
-    mock_weather_data, mock_wunderground_data, mock_combined_data, mock_fire_risk = mock_data
+_SCENARIO_WEATHER = {"STATION": []}
+_SCENARIO_COMBINED = {"air_temp": 25, "relative_humidity": 50, "wind_speed": 10, "soil_moisture_15cm": 20, "wind_gust": 15}
+_SCENARIO_FIELDS = ("temperature", "humidity", "wind_speed", "soil_moisture", "wind_gust")
+# Read-only field values for last_valid_data; _last_valid_data copies them per test
+_LAST_VALID_VALUES = MappingProxyType(
+    {"temperature": 25, "humidity": 50, "wind_speed": 10, "soil_moisture": 20, "wind_gust": 15}
+)
 
-    mock_get_synoptic_data.return_value = mock_weather_data
-    mock_get_wunderground_data.return_value = mock_wunderground_data
-    mock_combine_weather_data.return_value = mock_combined_data
-    mock_calculate_fire_risk.return_value = mock_fire_risk
 
-    # Create a risk data object with the expected structure
-    risk_data = {"risk": "low", "explanation": "explanation", "weather": mock_combined_data}
-    
-    # Use a mock instance of DataCache instead of the class
-    mock_cache = MagicMock(spec=DataCache)
-    mock_cache.fire_risk_data = risk_data
-    mock_cache.update_in_progress = False
-    mock_cache.reset_update_event = MagicMock()
-    mock_cache.max_retries = 3
-    mock_cache.update_timeout = 10
-    mock_cache.retry_delay = 5
-    mock_cache.cached_fields = {}
-    mock_cache.previous_risk_level = "Green" # Default previous risk
+def _last_valid_data(timestamp):
+    """Build last_valid_data with every field recorded at timestamp."""
+    fields = {name: {"value": value, "timestamp": timestamp} for name, value in _LAST_VALID_VALUES.items()}
+    fields["wind_gust"]["stations"] = {}
+    return {"timestamp": timestamp, "fields": fields}
 
-    # Patch the global data_cache instance
-    with patch('cache_refresh.data_cache', mock_cache):
-        # Run the test
-        assert await refresh_data_cache() is True
-        mock_cache.update_cache.assert_called_once()
-        assert mock_cache.fire_risk_data["risk"] == "low" # Risk calculated
-        assert mock_cache.previous_risk_level == "low" # Previous risk updated
-        assert mock_cache.last_update_success is True
 
+def _assert_retried_once(cache, mock_sleep):
+    # One backoff at the top of its jitter range: retry_delay for the first retry
+    assert mock_sleep.await_count == 1
+    (backoff,), _ = mock_sleep.await_args
+    assert backoff == cache.retry_delay
 
-@pytest.mark.asyncio
-@patch('cache_refresh.get_synoptic_data')
-@patch('cache_refresh.get_wunderground_data')
-@patch('cache_refresh.format_age_string')
-async def test_refresh_data_cache_api_failure(mock_format_age, mock_get_wunderground_data, mock_get_synoptic_data):
-    mock_get_synoptic_data.return_value = None  # Simulate API failure
-    mock_get_wunderground_data.return_value = None
-    mock_format_age.return_value = "20 minutes old"  # Mock age string formatting
 
-    # Use a mock instance of DataCache
-    mock_cache = MagicMock(spec=DataCache)
-    
-    # Setup mock cached data with timestamps
-    now = datetime.now(timezone.utc)
-    past = now - timedelta(minutes=20)
-    mock_cache.last_valid_data = {
-        "timestamp": past,
-        "fields": {
-            "temperature": {"value": 25, "timestamp": past},
-            "humidity": {"value": 50, "timestamp": past},
-            "wind_speed": {"value": 10, "timestamp": past},
-            "soil_moisture": {"value": 20, "timestamp": past},
-            "wind_gust": {"value": 15, "timestamp": past, "stations": {}}
-        }
-    }
-    
-    # Setup existing fire_risk_data to be updated
-    mock_cache.fire_risk_data = {
-        "risk": "low",
-        "explanation": "explanation",
-        "weather": {
-            "air_temp": 25,
-            "relative_humidity": 50,
-            "wind_speed": 10,
-            "soil_moisture_15cm": 20,
-            "wind_gust": 15
-        }
-    }
-    
-    mock_cache.update_in_progress = False
-    mock_cache.reset_update_event = MagicMock()
-    mock_cache.max_retries = 3
-    mock_cache.update_timeout = 10
-    mock_cache.retry_delay = 5
-    mock_cache.cached_fields = {
-        "temperature": False,
-        "humidity": False,
-        "wind_speed": False,
-        "soil_moisture": False,
-        "wind_gust": False
-    }
-    
-    # Patch the config logger to check warnings
-    with patch('cache_refresh.logger') as mock_logger:
-        # Patch the global data_cache instance
-        with patch('cache_refresh.data_cache', mock_cache):
-            # Setup expected combine_weather_data mock
-            with patch('cache_refresh.combine_weather_data') as mock_combine:
-                # In the real implementation, the function returns True on success
-                # even if it uses cached data, which matches our modified code
-                mock_combine.return_value = {
-                    "air_temp": None,
-                    "relative_humidity": None,
-                    "wind_speed": None,
-                    "soil_moisture_15cm": None,
-                    "wind_gust": None
-                }
-                
-                # Run the function under test
-                result = await refresh_data_cache()
-                assert result is False
-                
-                # Verify error logging
-                mock_logger.error.assert_any_call("All data refresh attempts failed")
-                
-                # Check that the warning was logged
-                mock_logger.warning.assert_any_call("Data refresh taking too long (over 10s), aborting")
-            
-    # Verify cache markers were properly set
-    assert mock_cache.last_update_success is False
-    assert mock_cache.using_cached_data is True
-    
+def _assert_backoff_capped(cache, mock_sleep):
+    # Backoff doubles from retry_delay until it reaches max_retry_delay
+    assert [args[0] for args, _ in mock_sleep.await_args_list] == [1, 2, 3]
+
+
+def _assert_cached_fallback(cache, mock_sleep):
     # Verify all fields are marked as cached
-    for field in mock_cache.cached_fields:
-        assert mock_cache.cached_fields[field] is True
-        
-    # Verify fire_risk_data was updated with proper cache markers
-    assert "cached_data" in mock_cache.fire_risk_data
-    assert mock_cache.fire_risk_data["cached_data"]["is_cached"] is True
-    assert mock_cache.fire_risk_data["cached_data"]["age"] == "20 minutes old"
+    assert cache.using_cached_data is True
+    for field in cache.cached_fields:
+        assert cache.cached_fields[field] is True
     
-    # Verify weather data has proper cache structure
-    assert "cached_fields" in mock_cache.fire_risk_data["weather"]
-    assert "timestamp" in mock_cache.fire_risk_data["weather"]["cached_fields"]
+    # Verify the fire_risk_data was updated with proper cache indicators
+    assert cache.fire_risk_data["cached_data"]["is_cached"] is True
+    assert cache.fire_risk_data["cached_data"]["age"] == "20 minutes old"
+    
+    # Verify weather data has cached_fields structure
+    assert "timestamp" in cache.fire_risk_data["weather"]["cached_fields"]
     
     # Verify modal content was added
-    assert "modal_content" in mock_cache.fire_risk_data
-    assert "note" in mock_cache.fire_risk_data["modal_content"]
-    assert "Displaying cached weather data" in mock_cache.fire_risk_data["modal_content"]["note"]
+    assert "Displaying cached weather data" in cache.fire_risk_data["modal_content"]["note"]
+
+
+def _log_fields(caplog, *names):
+    """Structured fields (logging ``extra``) of every captured record that has all of names."""
+    return [
+        {name: getattr(record, name) for name in names}
+        for record in caplog.records
+        if all(hasattr(record, name) for name in names)
+    ]
+
+
+@dataclass
+class RefreshScenario:
+    """What the API and data processing return during a refresh, and the expected outcome."""
+    synoptic_returns: Any
+    combine_side_effect: Any
+    expected_result: bool
+    expected_update_cache_calls: int
+    cache_overrides: Dict[str, Any] = field(default_factory=dict)
+    check: Optional[Callable[[MagicMock, AsyncMock], None]] = None
+
+
+SUCCESS = RefreshScenario(
+    synoptic_returns=_SCENARIO_WEATHER,
+    combine_side_effect=[_SCENARIO_COMBINED],
+    expected_result=True,
+    expected_update_cache_calls=1,
+)
+# First attempt with combine_weather_data raises an exception, second succeeds
+RETRY = RefreshScenario(
+    synoptic_returns=_SCENARIO_WEATHER,
+    combine_side_effect=[ValueError("First attempt should fail"), _SCENARIO_COMBINED],
+    expected_result=True,
+    expected_update_cache_calls=1,
+    cache_overrides={"max_retries": 2, "retry_delay": 0.01},
+    check=_assert_retried_once,
+)
+# Three failed attempts before success; the third backoff hits max_retry_delay
+CAPPED = RefreshScenario(
+    synoptic_returns=_SCENARIO_WEATHER,
+    combine_side_effect=[ValueError("Attempt should fail")] * 3 + [_SCENARIO_COMBINED],
+    expected_result=True,
+    expected_update_cache_calls=1,
+    cache_overrides={"max_retries": 4, "retry_delay": 1, "max_retry_delay": 3},
+    check=_assert_backoff_capped,
+)
+# The API returns nothing, so the cached-data fallback is used. Failed fetches
+# aren't counted as retries; attempts stop once the circuit breaker opens.
+CACHED = RefreshScenario(
+    synoptic_returns=None,
+    combine_side_effect=[dict.fromkeys(_SCENARIO_COMBINED)] * CircuitBreaker().minimum_throughput,
+    expected_result=False,
+    expected_update_cache_calls=0,
+    check=_assert_cached_fallback,
+)
+
+
+@pytest.mark.parametrize("scenario", [SUCCESS, RETRY, CAPPED, CACHED], ids=["success", "retry", "capped", "cached"])
+async def test_refresh_data_cache_scenarios(scenario, monkeypatch, mock_cache_factory, frozen_now, past_20m, no_sleep):
+    # 20-minute-old data is past stale_ttl, so a full refresh runs
+    mock_cache = mock_cache_factory(
+        last_valid_data=_last_valid_data(past_20m),
+        cached_fields=dict.fromkeys(_SCENARIO_FIELDS, False),
+        previous_risk_level="Green", # Default previous risk
+        risk_level_timestamp=None,
+        last_alerted_timestamp=None,
+        fire_risk_data={"risk": "low", "explanation": "explanation", "weather": dict(_SCENARIO_COMBINED)},
+        should_send_alert_for_transition=MagicMock(return_value=False),
+        **scenario.cache_overrides
+    )
+
+    monkeypatch.setattr(cache_refresh, "data_cache", mock_cache)
+    monkeypatch.setattr(cache_refresh, "get_synoptic_data", MagicMock(return_value=scenario.synoptic_returns))
+    monkeypatch.setattr(cache_refresh, "combine_weather_data", MagicMock(side_effect=scenario.combine_side_effect))
+    monkeypatch.setattr(cache_refresh, "calculate_fire_risk", MagicMock(return_value=("low", "explanation", {})))
+    mock_format_age = MagicMock(return_value="20 minutes old")
+    monkeypatch.setattr(cache_refresh, "format_age_string", mock_format_age)
+    # Full jitter draws from [0, cap]; always take the cap
+    monkeypatch.setattr(cache_refresh.random, "uniform", lambda low, high: high)
+
+    assert await refresh_data_cache(now=frozen_now) is scenario.expected_result
+
+    assert mock_cache.update_cache.call_count == scenario.expected_update_cache_calls
+    assert mock_cache.last_update_success is scenario.expected_result
+    # Every attempt and the fallback measure ages from the one "now"
+    assert all(args[0] is frozen_now for args, _ in mock_format_age.call_args_list)
+    if scenario.expected_result:
+        assert mock_cache.fire_risk_data["risk"] == "low" # Risk calculated
+        mock_cache.update_risk_level.assert_called_once_with("low") # Previous risk updated
+    if scenario.check:
+        scenario.check(mock_cache, no_sleep)
+
+
+async def test_refresh_data_cache_retry_backoff_is_concurrent(monkeypatch, mock_cache_factory, past_20m):
+    """Retry backoff awaits asyncio.sleep, so concurrent refreshes back off in parallel."""
+    n, retry_delay = 10, 0.05
+    mock_cache = mock_cache_factory(
+        last_valid_data=_last_valid_data(past_20m),
+        cached_fields=dict.fromkeys(_SCENARIO_FIELDS, False),
+        previous_risk_level="Green",
+        risk_level_timestamp=None,
+        last_alerted_timestamp=None,
+        fire_risk_data={"risk": "low", "explanation": "explanation", "weather": dict(_SCENARIO_COMBINED)},
+        max_retries=2,
+        retry_delay=retry_delay,
+        should_send_alert_for_transition=MagicMock(return_value=False),
+    )
+    # The first attempt of every refresh fails; the retries succeed
+    attempts = itertools.count()
+    def combine(*args, **kwargs):
+        if next(attempts) < n:
+            raise ValueError("First attempt should fail")
+        return dict(_SCENARIO_COMBINED)
+
+    sleeping = peak = 0
+    async def tracking_sleep(delay):
+        nonlocal sleeping, peak
+        sleeping += 1
+        peak = max(peak, sleeping)
+        try:
+            await _real_sleep(delay)
+        finally:
+            sleeping -= 1
+
+    monkeypatch.setattr(cache_refresh, "data_cache", mock_cache)
+    monkeypatch.setattr(cache_refresh, "get_synoptic_data", MagicMock(return_value=_SCENARIO_WEATHER))
+    monkeypatch.setattr(cache_refresh, "combine_weather_data", MagicMock(side_effect=combine))
+    monkeypatch.setattr(cache_refresh, "calculate_fire_risk", MagicMock(return_value=("low", "explanation", {})))
+    monkeypatch.setattr(cache_refresh.asyncio, "sleep", tracking_sleep)
+    monkeypatch.setattr(cache_refresh.random, "uniform", lambda low, high: high)
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(refresh_data_cache(force=True) for _ in range(n)))
+    elapsed = time.perf_counter() - start
+
+    assert results == [True] * n
+    # All n backoffs overlapped instead of running one after another
+    assert peak == n
+    assert elapsed < n * retry_delay
+
+
+@pytest.mark.parametrize("failed_fetches, expect_fetch, expected_warning", [
+    # The API keeps returning nothing until the failed fetches trip the circuit
+    (0, True, "Circuit breaker opened: 4/4 API calls failed in the last 60s"),
+    # Four failed fetches within the sampling window open the circuit
+    (4, False, "Circuit breaker open after repeated API failures, using cached data"),
+], ids=["api_failure", "circuit_open"])
+async def test_refresh_data_cache_fallback(failed_fetches, expect_fetch, expected_warning,
+                                           monkeypatch, mock_cache_factory, frozen_now, past_20m, caplog):
+    """When no fresh data can be fetched, the 20-minute-old cached data is served and marked as cached."""
+    mock_get_synoptic_data = MagicMock(return_value=None)  # Simulate API failure
+    monkeypatch.setattr(cache_refresh, "get_synoptic_data", mock_get_synoptic_data)
+    monkeypatch.setattr(cache_refresh, "combine_weather_data", MagicMock(return_value=dict.fromkeys(_SCENARIO_COMBINED)))
+    mock_format_age = MagicMock(return_value="20 minutes old")
+    monkeypatch.setattr(cache_refresh, "format_age_string", mock_format_age)
+
+    mock_cache = mock_cache_factory(
+        cached_fields=dict.fromkeys(_SCENARIO_FIELDS, False),
+        last_valid_data=_last_valid_data(past_20m),
+        fire_risk_data={"risk": "low", "explanation": "explanation", "weather": dict(_SCENARIO_COMBINED)},
+    )
+    mock_cache.circuit.outcomes.extend([(time.monotonic(), False)] * failed_fetches)
+    monkeypatch.setattr(cache_refresh, "data_cache", mock_cache)
+
+    # Capture warnings and errors from the config logger
+    with caplog.at_level(logging.WARNING, logger='config'):
+        assert await refresh_data_cache(now=frozen_now) is False
+
+    assert mock_get_synoptic_data.called is expect_fetch
+    # Every attempt and the fallback measure ages from the one "now"
+    assert mock_format_age.called
+    assert all(args[0] is frozen_now for args, _ in mock_format_age.call_args_list)
+    messages = {record.message for record in caplog.records}
+    assert "All data refresh attempts failed" in messages
+    assert expected_warning in messages
 
+    assert mock_cache.last_update_success is False
+    _assert_cached_fallback(mock_cache, None)
+    # The cached weather values are kept
+    assert mock_cache.fire_risk_data["weather"]["air_temp"] == 25
+
+
+async def test_refresh_data_cache_single_flight(monkeypatch):
+    """Concurrent unforced refreshes wait for and share a single fetch."""
+    cache = DataCache()
+    cache.fire_risk_data = None # Nothing cached yet, so there is no stale-while-revalidate shortcut
+
+    def slow_fetch():
+        time.sleep(0.05)
+        return _SCENARIO_WEATHER
+
+    mock_fetch = MagicMock(side_effect=slow_fetch)
+    monkeypatch.setattr(cache_refresh, "data_cache", cache)
+    monkeypatch.setattr(cache_refresh, "get_synoptic_data", mock_fetch)
+    monkeypatch.setattr(cache_refresh, "combine_weather_data", MagicMock(return_value=dict(_SCENARIO_COMBINED)))
+    monkeypatch.setattr(cache_refresh, "calculate_fire_risk", MagicMock(return_value=("Green", "explanation", {})))
+
+    results = await asyncio.gather(*(refresh_data_cache() for _ in range(50)))
+
+    assert results == [True] * 50
+    assert mock_fetch.call_count == 1
+    assert cache.update_in_progress is False
+
+
+async def test_refresh_data_cache_bulkhead(monkeypatch):
+    """Forced refreshes don't coalesce, but only one Synoptic call runs at a time."""
+    cache = DataCache()
+    cache.fire_risk_data = None
+
+    in_flight = peak = 0
+    lock = threading.Lock()
+    def slow_fetch():
+        nonlocal in_flight, peak
+        with lock:
+            in_flight += 1
+            peak = max(peak, in_flight)
+        time.sleep(0.02)
+        with lock:
+            in_flight -= 1
+        return _SCENARIO_WEATHER
+
+    mock_fetch = MagicMock(side_effect=slow_fetch)
+    monkeypatch.setattr(cache_refresh, "data_cache", cache)
+    monkeypatch.setattr(cache_refresh, "get_synoptic_data", mock_fetch)
+    monkeypatch.setattr(cache_refresh, "combine_weather_data", MagicMock(return_value=dict(_SCENARIO_COMBINED)))
+    monkeypatch.setattr(cache_refresh, "calculate_fire_risk", MagicMock(return_value=("Green", "explanation", {})))
+
+    results = await asyncio.gather(*(refresh_data_cache(force=True) for _ in range(10)))
+
+    assert results == [True] * 10
+    assert mock_fetch.call_count == 10
+    assert peak == 1
+
+
+@pytest.mark.parametrize("age, revalidates, fetches", [
+    (30, False, False),   # fresh: under fresh_ttl, served as is
+    (61, True, False),    # stale: served at once, refreshed in the background
+    (700, False, True),   # rotten: past stale_ttl, refreshed before returning
+], ids=["fresh", "stale", "rotten"])
+async def test_refresh_data_cache_swr(age, revalidates, fetches, monkeypatch, mock_cache_factory, frozen_now):
+    """Unforced refreshes serve cached data by age: fresh, stale-while-revalidate or rotten."""
+    mock_get_synoptic_data = MagicMock(return_value=None)
+    monkeypatch.setattr(cache_refresh, "get_synoptic_data", mock_get_synoptic_data)
+    monkeypatch.setattr(cache_refresh, "format_age_string", MagicMock(return_value="old"))
+    mock_create_task = MagicMock()
+    monkeypatch.setattr(cache_refresh.asyncio, "create_task", mock_create_task)
+    mock_cache = mock_cache_factory(
+        fire_risk_data={"risk": "low", "explanation": "test", "weather": {}},
+        last_valid_data=_last_valid_data(frozen_now - timedelta(seconds=age)),
+        cached_fields=dict.fromkeys(_SCENARIO_FIELDS, False),
+    )
+    monkeypatch.setattr(cache_refresh, "data_cache", mock_cache)
+
+    start = time.perf_counter()
+    result = await refresh_data_cache(now=frozen_now)
+    elapsed = time.perf_counter() - start
+
+    assert mock_create_task.call_count == int(revalidates)
+    assert mock_get_synoptic_data.called is fetches
+    if revalidates:
+        mock_create_task.call_args.args[0].close()  # The refresh coroutine was never scheduled
+        assert mock_cache.update_in_progress is True
+    if fetches:
+        # Upstream is down in this test, so the refresh falls back to cached data
+        assert result is False
+    else:
+        assert result is True
+        # Far below a single fetch or retry_delay; loose enough not to flake on slow CI
+        assert elapsed < 0.1
+
+
+@pytest.mark.parametrize("last_valid_data", [None, {"fields": {}}], ids=["no_last_valid_data", "no_timestamp"])
+async def test_refresh_data_cache_swr_unknown_age(last_valid_data, monkeypatch, mock_cache_factory):
+    """Cached data without a last_valid_data timestamp has no known age, so it is refreshed."""
+    mock_get_synoptic_data = MagicMock(return_value=None)
+    monkeypatch.setattr(cache_refresh, "get_synoptic_data", mock_get_synoptic_data)
+    mock_cache = mock_cache_factory(
+        max_retries=1,
+        fire_risk_data={"risk": "low", "explanation": "test", "weather": {}},
+        last_valid_data=last_valid_data,
+    )
+    monkeypatch.setattr(cache_refresh, "data_cache", mock_cache)
+
+    # Upstream is down, so the refresh itself fails - but it was attempted
+    assert await refresh_data_cache() is False
+    assert mock_get_synoptic_data.called
+    assert mock_cache.fire_risk_data["cached_data"]["is_cached"] is True
 
-@pytest.mark.asyncio
-@patch('cache_refresh.get_synoptic_data')
-@patch('cache_refresh.get_wunderground_data')
-@patch('cache_refresh.asyncio.sleep', new_callable=AsyncMock)  # Mock asyncio.sleep
-async def test_refresh_data_cache_retry(mock_sleep, mock_get_wunderground_data, mock_get_synoptic_data, mock_data):
-    mock_weather_data, mock_wunderground_data, mock_combined_data, mock_fire_risk = mock_data
 
-    # Set up normal API returns
-    mock_get_synoptic_data.return_value = mock_weather_data
-    mock_get_wunderground_data.return_value = mock_wunderground_data
-    
-    with patch('cache_refresh.combine_weather_data') as mock_combine:
-        with patch('cache_refresh.calculate_fire_risk') as mock_calc:
-            # First attempt with combine_weather_data raises an exception, second succeeds
-            def combine_side_effect(*args, **kwargs):
-                if not hasattr(combine_side_effect, 'called'):
-                    combine_side_effect.called = True
-                    raise ValueError("First attempt should fail")
-                return mock_combined_data
-            
-            mock_combine.side_effect = combine_side_effect
-            mock_calc.return_value = mock_fire_risk
-            
-            # Create a risk data object with the expected structure
-            risk_data = {"risk": "low", "explanation": "explanation", "weather": mock_combined_data}
-            
-            # Use a mock instance of DataCache
-            mock_cache = MagicMock(spec=DataCache)
-            mock_cache.fire_risk_data = risk_data
-            mock_cache.max_retries = 2
-            mock_cache.retry_delay = 0.01
-            mock_cache.update_in_progress = False
-            mock_cache.reset_update_event = MagicMock()
-            mock_cache.update_timeout = 10
-            mock_cache.cached_fields = {}
-            
-            # Patch the global data_cache instance
-            with patch('cache_refresh.data_cache', mock_cache):
-                assert await refresh_data_cache() is True
-                mock_cache.update_cache.assert_called_once()
-                assert mock_cache.fire_risk_data["risk"] == "low"
-                mock_sleep.assert_awaited_once()  # Check if asyncio.sleep was called
-
-
-@pytest.mark.asyncio
-@patch('cache_refresh.get_synoptic_data')
-@patch('cache_refresh.get_wunderground_data')
-@patch('cache_refresh.asyncio.sleep', new_callable=AsyncMock)
-async def test_refresh_data_cache_timeout(mock_sleep, mock_get_wunderground_data, mock_get_synoptic_data):
-    # Use AsyncMock objects with side_effect to simulate long API calls
-    # This creates a coroutine that needs to be awaited
-    async def slow_api_call():
-        await asyncio.sleep(0.1)
+async def test_refresh_data_cache_timeout(monkeypatch, mock_cache_factory, frozen_now, caplog, no_sleep):
+    # Simulate a blocking API call that only returns once the test releases it, so
+    # the refresh deadline is the only thing that can end the wait, however slow
+    # the machine. It runs in the thread pool.
+    release = threading.Event()
+    def slow_api_call():
+        release.wait()
         return None
         
-    mock_get_synoptic_data.side_effect = slow_api_call
-    mock_get_wunderground_data.side_effect = slow_api_call
-
-    # Use a mock instance of DataCache
-    mock_cache = MagicMock(spec=DataCache)
-    mock_cache.update_timeout = 0.01  # Set a very short timeout
-    mock_cache.update_in_progress = False
-    mock_cache.reset_update_event = MagicMock()
-    mock_cache.max_retries = 3
-    mock_cache.retry_delay = 5
-    mock_cache.cached_fields = {}
-    # Add fire_risk_data attribute to fix AttributeError
-    mock_cache.fire_risk_data = {"risk": "low", "explanation": "test", "weather": {}}
-    
-    # Add last_valid_data attribute to fix AttributeError
-    now = datetime.now(timezone.utc)
-    mock_cache.last_valid_data = {
-        "timestamp": now,
-        "fields": {
-            "temperature": {"value": 25, "timestamp": now},
-            "humidity": {"value": 50, "timestamp": now},
-            "wind_speed": {"value": 10, "timestamp": now},
-            "soil_moisture": {"value": 20, "timestamp": now},
-            "wind_gust": {"value": 15, "timestamp": now, "stations": {}}
-        }
-    }
+    monkeypatch.setattr(cache_refresh, "get_synoptic_data", MagicMock(side_effect=slow_api_call))
+    # A bulkhead of this test's own, so one left held can't block other tests
+    bulkhead = asyncio.Semaphore(1)
+    monkeypatch.setattr(cache_refresh, "_fetch_bulkhead", bulkhead)
+
+    # Use a fake DataCache
+    # Very short timeout; zero TTLs so the fresh data below is still refreshed
+    mock_cache = mock_cache_factory(
+        update_timeout=0.01,
+        fresh_ttl=0,
+        stale_ttl=0,
+        fire_risk_data={"risk": "low", "explanation": "test", "weather": {}},
+        last_valid_data=_last_valid_data(frozen_now),
+    )
     
     # Patch the global data_cache instance
-    with patch('cache_refresh.data_cache', mock_cache):
-        # Mock time.time() to simulate time passing during the test
-        with patch('time.time', side_effect=[0, 0.02, 0.03]):  # Returns increasing times
+    monkeypatch.setattr(cache_refresh, "data_cache", mock_cache)
+    try:
+        with caplog.at_level(logging.WARNING, logger='config'):
+            # The refresh is cancelled at its deadline instead of waiting for the call
             assert await refresh_data_cache() is False
+        # The worker thread is still running, so it keeps its bulkhead permit
+        assert bulkhead.locked()
+    finally:
+        # Let the worker thread finish
+        release.set()
+    # ...and the permit is released once it has
+    for _ in range(500):
+        if not bulkhead.locked():
+            break
+        await _real_sleep(0.01)
+    assert not bulkhead.locked()
             
+    messages = {record.message for record in caplog.records}
+    assert "Data refresh taking too long (over 0.01s), aborting" in messages
+    # The cut-off fetch counts as a failure for the circuit breaker
+    assert [success for _, success in mock_cache.circuit.outcomes] == [False]
     # Verify sleep was not awaited
-    mock_sleep.assert_not_awaited()
-
-
-@pytest.mark.asyncio
-@patch('cache_refresh.get_synoptic_data')
-@patch('cache_refresh.get_wunderground_data')
-@patch('cache_refresh.format_age_string')
-async def test_refresh_data_cache_cached_data(mock_format_age, mock_get_wunderground_data, mock_get_synoptic_data, mock_data):
-    mock_weather_data, mock_wunderground_data, mock_combined_data, mock_fire_risk = mock_data
-    mock_format_age.return_value = "20 minutes old"  # Mock age string formatting
-
-    mock_get_synoptic_data.return_value = None
-    mock_get_wunderground_data.return_value = None
-
-    # Create a mock DataCache instance
-    mock_cache = MagicMock(spec=DataCache)
-    mock_cache.update_in_progress = False
-    mock_cache.reset_update_event = MagicMock()
-    mock_cache.max_retries = 3
-    mock_cache.update_timeout = 10
-    mock_cache.retry_delay = 5
-    mock_cache.cached_fields = {
-        "temperature": False,
-        "humidity": False,
-        "wind_speed": False,
-        "soil_moisture": False,
-        "wind_gust": False
-    }
-    
-    # Populate mock cache with initial data
-    now = datetime.now(timezone.utc)
-    past = now - timedelta(minutes=20)
-    
-    # Setup cached data with valid values that should be used when API calls fail
-    mock_cache.last_valid_data = {
-        "fields": {
-            "temperature": {"value": 26, "timestamp": past},
-            "humidity": {"value": 11, "timestamp": past},
-            "wind_speed": {"value": 21, "timestamp": past},
-            "soil_moisture": {"value": 1, "timestamp": past},
-            "wind_gust": {"value": 16, "timestamp": past, "stations": {}}
-        },
-        "synoptic_data": mock_weather_data,
-        "wunderground_data": mock_wunderground_data,
-        "fire_risk_data": {"risk": "moderate"},
-        "timestamp": past,
-        "weather": {
-            "air_temp": 26,
-            "relative_humidity": 11,
-            "wind_speed": 21,
-            "soil_moisture_15cm": 1,
-            "wind_gust": 16
-        }
-    }
-    
-    # Setup expected cached risk data
-    mock_cache.fire_risk_data = {
-        "risk": "moderate",
-        "weather": {
-            "air_temp": 26,
-            "relative_humidity": 11,
-            "wind_speed": 21,
-            "soil_moisture_15cm": 1,
-            "wind_gust": 16
-        }
-    }
-    
-    # Patch the global data_cache instance
-    with patch('cache_refresh.data_cache', mock_cache):
-        with patch('cache_refresh.combine_weather_data') as mock_combine:
-            # Configure combine_weather_data to return data with None values
-            # which will trigger the cache fallback
-            mock_combine.return_value = {
-                "air_temp": None,
-                "relative_humidity": None,
-                "wind_speed": None,
-                "soil_moisture_15cm": None,
-                "wind_gust": None
-            }
-            
-            # Our new implementation returns False when all API calls fail
-            assert await refresh_data_cache() is False
+    assert no_sleep.await_count == 0
 
-        # Verify cache state after refresh
-        assert mock_cache.last_update_success is False
-        assert mock_cache.using_cached_data is True
-        
-        # Verify all fields are marked as cached
-        for field in mock_cache.cached_fields:
-            assert mock_cache.cached_fields[field] is True
-            
-        # Verify the fire_risk_data was updated with proper cache indicators
-        assert "cached_data" in mock_cache.fire_risk_data
-        assert mock_cache.fire_risk_data["cached_data"]["is_cached"] is True
-        assert mock_cache.fire_risk_data["cached_data"]["age"] == "20 minutes old"
-        
-        # Verify weather data has cached_fields structure
-        assert "cached_fields" in mock_cache.fire_risk_data["weather"]
-        assert "timestamp" in mock_cache.fire_risk_data["weather"]["cached_fields"]
-        
-        # Verify modal content was added
-        assert "modal_content" in mock_cache.fire_risk_data
-        assert "note" in mock_cache.fire_risk_data["modal_content"]
-        assert "Displaying cached weather data" in mock_cache.fire_risk_data["modal_content"]["note"]
+
+async def test_refresh_data_cache_executor_unavailable(monkeypatch, mock_cache_factory, frozen_now):
+    """A fetch that can't be submitted to the thread pool gives its bulkhead permit back."""
+    bulkhead = asyncio.Semaphore(1)
+    monkeypatch.setattr(cache_refresh, "_fetch_bulkhead", bulkhead)
+    mock_run_in_executor = MagicMock(side_effect=RuntimeError("cannot schedule new futures after shutdown"))
+    monkeypatch.setattr(asyncio.get_running_loop(), "run_in_executor", mock_run_in_executor)
+    mock_cache = mock_cache_factory(
+        fire_risk_data={"risk": "low", "explanation": "test", "weather": {}},
+        last_valid_data=_last_valid_data(frozen_now),
+    )
+    monkeypatch.setattr(cache_refresh, "data_cache", mock_cache)
+
+    assert await refresh_data_cache(force=True) is False
+
+    # Every retry got the permit back and tried again, instead of blocking on it
+    assert mock_run_in_executor.call_count == mock_cache.max_retries
+    assert not bulkhead.locked()
 
 
-@pytest.mark.asyncio
-@patch('cache_refresh.refresh_data_cache')
-async def test_schedule_next_refresh_exception(mock_refresh_data_cache, caplog):
-    mock_refresh_data_cache.side_effect = Exception("Test Exception")
+async def test_schedule_next_refresh_exception(monkeypatch, mock_cache_factory, caplog):
+    monkeypatch.setattr(cache_refresh, "refresh_data_cache", AsyncMock(side_effect=Exception("Test Exception")))
     
-    # Use a mock instance of DataCache
-    mock_cache = MagicMock(spec=DataCache)
-    mock_cache.refresh_task_active = True
+    # Use a fake DataCache
+    mock_cache = mock_cache_factory(refresh_task_active=True)
     
     # Patch the global data_cache instance
-    with patch('cache_refresh.data_cache', mock_cache):
-        await schedule_next_refresh(0.01)
+    monkeypatch.setattr(cache_refresh, "data_cache", mock_cache)
+    await schedule_next_refresh(0.01)
         
-        # The actual error message is "Error in scheduled refresh: Test Exception"
-        assert "Error in scheduled refresh: Test Exception" in caplog.text
-        assert mock_cache.refresh_task_active is False
+    # The actual error message is "Error in scheduled refresh: Test Exception"
+    assert "Error in scheduled refresh: Test Exception" in caplog.text
+    assert mock_cache.refresh_task_active is False
 
 
 # --- Tests for Orange-to-Red Alert Logic ---
 
-@pytest.mark.asyncio
-@patch('cache_refresh.get_synoptic_data')
-@patch('cache_refresh.combine_weather_data')
-@patch('cache_refresh.calculate_fire_risk')
-@patch('cache_refresh.get_active_subscribers')
-@patch('cache_refresh.send_orange_to_red_alert')
-async def test_refresh_data_cache_orange_to_red_alert_sent(
-    mock_send_alert, mock_get_subscribers, mock_calculate_fire_risk,
-    mock_combine_weather_data, mock_get_synoptic_data, mock_data
-):
+# Effective values calculate_fire_risk evaluated, which the alert email shows
+_ALERT_EVAL_DATA = MappingProxyType(
+    {"temperature": 77, "humidity": 50, "wind_speed": 10, "wind_gust": 15, "soil_moisture": 20}
+)
+
+
+def _alert_cache(mock_cache_factory, previous_risk_level):
+    """Fake cache for one refresh attempt, deciding alerts with DataCache's real transition rule."""
+    mock_cache = mock_cache_factory(
+        max_retries=1,
+        retry_delay=1,
+        previous_risk_level=previous_risk_level,
+        fire_risk_data={"risk": previous_risk_level},
+    )
+    # The rule only reads the risk level and alert timestamps, which the fake has
+    mock_cache.should_send_alert_for_transition = MethodType(DataCache.should_send_alert_for_transition, mock_cache)
+    return mock_cache
+
+async def test_refresh_data_cache_orange_to_red_alert_sent(monkeypatch, mock_data, mock_cache_factory, caplog):
     """Test that alert is sent on Orange -> Red transition with subscribers."""
     mock_weather_data, _, mock_combined_data, _ = mock_data
     test_subscribers = ["test1@example.com", "test2@example.com"]
     risk_explanation = "Conditions extremely dry and windy"
 
     # Setup mocks
-    mock_get_synoptic_data.return_value = mock_weather_data
-    mock_combine_weather_data.return_value = mock_combined_data
-    mock_calculate_fire_risk.return_value = ("Red", risk_explanation) # New risk is Red
-    mock_get_subscribers.return_value = test_subscribers
-    mock_send_alert.return_value = "mock-message-id" # Simulate successful send
+    mock_get_subscribers = MagicMock(return_value={"subscribers": test_subscribers})
+    mock_send_alert = MagicMock(return_value="mock-message-id") # Simulate successful send
+    monkeypatch.setattr(cache_refresh, "get_synoptic_data", MagicMock(return_value=mock_weather_data))
+    monkeypatch.setattr(cache_refresh, "combine_weather_data", MagicMock(return_value=mock_combined_data))
+    monkeypatch.setattr(cache_refresh, "calculate_fire_risk", MagicMock(return_value=("Red", risk_explanation, _ALERT_EVAL_DATA))) # New risk is Red
+    monkeypatch.setattr(cache_refresh, "get_active_subscribers", mock_get_subscribers)
+    monkeypatch.setattr(cache_refresh, "send_orange_to_red_alert", mock_send_alert)
+    mock_create_task = MagicMock(side_effect=asyncio.create_task)
+    monkeypatch.setattr(cache_refresh.asyncio, "create_task", mock_create_task)
 
     # Configure mock cache
-    mock_cache = MagicMock(spec=DataCache)
-    mock_cache.update_in_progress = False
-    mock_cache.reset_update_event = MagicMock()
-    mock_cache.max_retries = 1
-    mock_cache.update_timeout = 10
-    mock_cache.retry_delay = 1
-    mock_cache.cached_fields = {}
-    mock_cache.previous_risk_level = "Orange" # CRITICAL: Previous risk was Orange
-    mock_cache.fire_risk_data = {"risk": "Orange"} # Initial state
-
-    # Patch the global data_cache instance and logger
-    with patch('cache_refresh.data_cache', mock_cache), \
-         patch('cache_refresh.logger') as mock_logger:
-        # Run the refresh
-        result = await refresh_data_cache()
-
-        # Assertions
-        assert result is True # Refresh itself should succeed
-        mock_get_subscribers.assert_called_once()
-        mock_send_alert.assert_called_once()
-
-        # Check arguments passed to send_orange_to_red_alert
-        call_args, call_kwargs = mock_send_alert.call_args
-        sent_recipients = call_args[0]
-        sent_weather_data = call_args[1]
-
-        assert sent_recipients == test_subscribers
-        # Check if weather data was formatted correctly (based on cache_refresh logic)
-        assert sent_weather_data['temperature'] == f"{mock_combined_data.get('air_temp', 'N/A')}°C"
-        assert sent_weather_data['humidity'] == f"{mock_combined_data.get('relative_humidity', 'N/A')}%"
-        assert sent_weather_data['wind_speed'] == f"{mock_combined_data.get('wind_speed', 'N/A')} mph"
-        assert sent_weather_data['wind_gust'] == f"{mock_combined_data.get('wind_gust', 'N/A')} mph"
-        assert sent_weather_data['soil_moisture'] == f"{mock_combined_data.get('soil_moisture_15cm', 'N/A')}%"
-
-        # Check logs
-        mock_logger.info.assert_any_call(f"Risk transition detected: Orange -> Red. Preparing alert.")
-        mock_logger.info.assert_any_call(f"Found {len(test_subscribers)} active subscribers for the alert.")
-        mock_logger.info.assert_any_call(f"Orange-to-Red alert email sent successfully to {len(test_subscribers)} subscribers. Message ID: mock-message-id")
-
-        # Verify cache update
-        mock_cache.update_cache.assert_called_once()
-        # Check that previous_risk_level was updated *after* the check
-        assert mock_cache.previous_risk_level == "Red"
-
-
-@pytest.mark.asyncio
-@patch('cache_refresh.get_synoptic_data')
-@patch('cache_refresh.combine_weather_data')
-@patch('cache_refresh.calculate_fire_risk')
-@patch('cache_refresh.get_active_subscribers')
-@patch('cache_refresh.send_orange_to_red_alert')
-async def test_refresh_data_cache_orange_to_red_no_subscribers(
-    mock_send_alert, mock_get_subscribers, mock_calculate_fire_risk,
-    mock_combine_weather_data, mock_get_synoptic_data, mock_data
-):
+    mock_cache = _alert_cache(mock_cache_factory, "Orange") # CRITICAL: Previous risk was Orange
+
+    # Patch the global data_cache instance
+    monkeypatch.setattr(cache_refresh, "data_cache", mock_cache)
+    caplog.set_level(logging.INFO, logger='config')
+    # Run the refresh
+    result = await refresh_data_cache()
+
+    # The email is sent in the background, off the refresh path: the refresh
+    # returns before the send has started
+    mock_create_task.assert_called_once()
+    assert len(cache_refresh._pending_alerts) == 1
+    mock_send_alert.assert_not_called()
+    await cache_refresh.wait_for_pending_alerts()
+    assert not cache_refresh._pending_alerts
+
+    # Assertions
+    assert result is True # Refresh itself should succeed
+    mock_get_subscribers.assert_called_once()
+    mock_send_alert.assert_called_once()
+
+    # Check arguments passed to send_orange_to_red_alert
+    call_args, call_kwargs = mock_send_alert.call_args
+    sent_recipients = call_args[0]
+    sent_weather_data = call_args[1]
+
+    assert sent_recipients == test_subscribers
+    # The email shows the values the risk was evaluated on, in display units
+    assert sent_weather_data == {
+        'temperature': "77°F",
+        'humidity': "50%",
+        'wind_speed': "10 mph",
+        'wind_gust': "15 mph",
+        'soil_moisture': "20%",
+    }
+    mock_cache.record_alert_sent.assert_called_once()
+    assert mock_cache.last_email_send_outcome == "success"
+
+    # Check the structured log fields
+    assert _log_fields(caplog, "risk_transition_from", "risk_transition_to") == [
+        {"risk_transition_from": "Orange", "risk_transition_to": "Red"}
+    ]
+    assert {"subscriber_count": len(test_subscribers)} in _log_fields(caplog, "subscriber_count")
+    assert _log_fields(caplog, "message_id") == [{"message_id": "mock-message-id"}]
+
+    # Verify cache update
+    assert mock_cache.update_cache.call_count == 1
+    # The risk level is updated *after* the transition check
+    mock_cache.update_risk_level.assert_called_once_with("Red")
+
+
+async def test_refresh_data_cache_orange_to_red_no_subscribers(monkeypatch, mock_data, mock_cache_factory, caplog):
     """Test Orange -> Red transition when no subscribers are found."""
     mock_weather_data, _, mock_combined_data, _ = mock_data
     risk_explanation = "Conditions extremely dry and windy"
 
     # Setup mocks
-    mock_get_synoptic_data.return_value = mock_weather_data
-    mock_combine_weather_data.return_value = mock_combined_data
-    mock_calculate_fire_risk.return_value = ("Red", risk_explanation)
-    mock_get_subscribers.return_value = [] # No subscribers
+    mock_get_subscribers = MagicMock(return_value={"subscribers": []}) # No subscribers
+    mock_send_alert = MagicMock()
+    monkeypatch.setattr(cache_refresh, "get_synoptic_data", MagicMock(return_value=mock_weather_data))
+    monkeypatch.setattr(cache_refresh, "combine_weather_data", MagicMock(return_value=mock_combined_data))
+    monkeypatch.setattr(cache_refresh, "calculate_fire_risk", MagicMock(return_value=("Red", risk_explanation, _ALERT_EVAL_DATA)))
+    monkeypatch.setattr(cache_refresh, "get_active_subscribers", mock_get_subscribers)
+    monkeypatch.setattr(cache_refresh, "send_orange_to_red_alert", mock_send_alert)
 
     # Configure mock cache
-    mock_cache = MagicMock(spec=DataCache)
-    mock_cache.update_in_progress = False
-    mock_cache.reset_update_event = MagicMock()
-    mock_cache.max_retries = 1
-    mock_cache.update_timeout = 10
-    mock_cache.retry_delay = 1
-    mock_cache.cached_fields = {}
-    mock_cache.previous_risk_level = "Orange"
-    mock_cache.fire_risk_data = {"risk": "Orange"}
-
-    # Patch the global data_cache instance and logger
-    with patch('cache_refresh.data_cache', mock_cache), \
-         patch('cache_refresh.logger') as mock_logger:
-        # Run the refresh
-        result = await refresh_data_cache()
-
-        # Assertions
-        assert result is True
-        mock_get_subscribers.assert_called_once()
-        mock_send_alert.assert_not_called() # Alert should NOT be sent
+    mock_cache = _alert_cache(mock_cache_factory, "Orange")
+
+    # Patch the global data_cache instance
+    monkeypatch.setattr(cache_refresh, "data_cache", mock_cache)
+    caplog.set_level(logging.INFO, logger='config')
+    # Run the refresh
+    result = await refresh_data_cache()
+
+    # Assertions
+    assert result is True
+    mock_get_subscribers.assert_called_once()
+    mock_send_alert.assert_not_called() # Alert should NOT be sent
 
-        # Check logs
-        mock_logger.info.assert_any_call(f"Risk transition detected: Orange -> Red. Preparing alert.")
-        mock_logger.warning.assert_any_call("Orange-to-Red transition detected, but no active subscribers found.")
+    # Check logs
+    assert _log_fields(caplog, "risk_transition_from", "risk_transition_to") == [
+        {"risk_transition_from": "Orange", "risk_transition_to": "Red"}
+    ]
+    assert "Orange-to-Red transition detected, but no active subscribers found." in caplog.messages
+    assert mock_cache.last_email_send_outcome == "not_triggered_no_recipients"
 
-        # Verify cache update
-        mock_cache.update_cache.assert_called_once()
-        assert mock_cache.previous_risk_level == "Red"
+    # Verify cache update
+    assert mock_cache.update_cache.call_count == 1
+    mock_cache.update_risk_level.assert_called_once_with("Red")
 
 
-@pytest.mark.asyncio
 @pytest.mark.parametrize("prev_risk, new_risk", [
     ("Green", "Orange"),
     ("Orange", "Orange"),
@@ -502,65 +605,96 @@ async def test_refresh_data_cache_orange_to_red_no_subscribers(
     ("Red", "Red"),
     ("Green", "Red"), # Test non-Orange start
 ])
-@patch('cache_refresh.get_synoptic_data')
-@patch('cache_refresh.combine_weather_data')
-@patch('cache_refresh.calculate_fire_risk')
-@patch('cache_refresh.get_active_subscribers')
-@patch('cache_refresh.send_orange_to_red_alert')
-async def test_refresh_data_cache_no_alert_on_other_transitions(
-    mock_send_alert, mock_get_subscribers, mock_calculate_fire_risk,
-    mock_combine_weather_data, mock_get_synoptic_data, mock_data,
-    prev_risk, new_risk
-):
+async def test_refresh_data_cache_no_alert_on_other_transitions(monkeypatch, mock_data, mock_cache_factory, prev_risk, new_risk, caplog):
     """Test that alert is NOT sent for transitions other than Orange -> Red."""
     mock_weather_data, _, mock_combined_data, _ = mock_data
     risk_explanation = "Some reason"
 
     # Setup mocks
-    mock_get_synoptic_data.return_value = mock_weather_data
-    mock_combine_weather_data.return_value = mock_combined_data
-    mock_calculate_fire_risk.return_value = (new_risk, risk_explanation)
+    mock_get_subscribers = MagicMock()
+    mock_send_alert = MagicMock()
+    monkeypatch.setattr(cache_refresh, "get_synoptic_data", MagicMock(return_value=mock_weather_data))
+    monkeypatch.setattr(cache_refresh, "combine_weather_data", MagicMock(return_value=mock_combined_data))
+    monkeypatch.setattr(cache_refresh, "calculate_fire_risk", MagicMock(return_value=(new_risk, risk_explanation, _ALERT_EVAL_DATA)))
+    monkeypatch.setattr(cache_refresh, "get_active_subscribers", mock_get_subscribers)
+    monkeypatch.setattr(cache_refresh, "send_orange_to_red_alert", mock_send_alert)
 
     # Configure mock cache
-    mock_cache = MagicMock(spec=DataCache)
-    mock_cache.update_in_progress = False
-    mock_cache.reset_update_event = MagicMock()
-    mock_cache.max_retries = 1
-    mock_cache.update_timeout = 10
-    mock_cache.retry_delay = 1
-    mock_cache.cached_fields = {}
-    mock_cache.previous_risk_level = prev_risk # Set previous risk from parameter
-    mock_cache.fire_risk_data = {"risk": prev_risk}
+    mock_cache = _alert_cache(mock_cache_factory, prev_risk) # Set previous risk from parameter
 
     # Patch the global data_cache instance
-    with patch('cache_refresh.data_cache', mock_cache):
-        # Run the refresh
-        result = await refresh_data_cache()
-
-        # Assertions
-        assert result is True
-        mock_get_subscribers.assert_not_called() # Should not even check subscribers
-        mock_send_alert.assert_not_called()     # Alert should definitely not be sent
-
-        # Verify cache update
-        mock_cache.update_cache.assert_called_once()
-        assert mock_cache.previous_risk_level == new_risk # Previous risk updated to new risk
-
-
-@pytest.mark.asyncio
-@patch('cache_refresh.refresh_data_cache')
-async def test_schedule_next_refresh(mock_refresh_data_cache):
-    mock_refresh_data_cache.return_value = True
-
-    # Use a mock instance of DataCache
-    mock_cache = MagicMock(spec=DataCache)
-    mock_cache.refresh_task_active = True
+    monkeypatch.setattr(cache_refresh, "data_cache", mock_cache)
+    caplog.set_level(logging.INFO, logger='config')
+    # Run the refresh
+    result = await refresh_data_cache()
+
+    # Assertions
+    assert result is True
+    mock_get_subscribers.assert_not_called() # Should not even check subscribers
+    mock_send_alert.assert_not_called()     # Alert should definitely not be sent
+    assert _log_fields(caplog, "risk_transition_from", "risk_transition_to") == []
+
+    # Verify cache update
+    assert mock_cache.update_cache.call_count == 1
+    mock_cache.update_risk_level.assert_called_once_with(new_risk) # Previous risk updated to new risk
+
+
+async def test_refresh_data_cache_subscribers_cached(monkeypatch, mock_cache_factory, past_20m, caplog):
+    """Orange -> Red transitions within SUBSCRIBERS_CACHE_TTL share one subscriber lookup."""
+    mock_get_subscribers = MagicMock(return_value={"subscribers": ["test@example.com"]})
+    mock_send_alert = MagicMock(return_value="mock-message-id")
+    monkeypatch.setattr(cache_refresh, "get_synoptic_data", MagicMock(return_value=_SCENARIO_WEATHER))
+    monkeypatch.setattr(cache_refresh, "combine_weather_data", MagicMock(return_value=dict(_SCENARIO_COMBINED)))
+    monkeypatch.setattr(cache_refresh, "calculate_fire_risk", MagicMock(return_value=("Red", "explanation", {})))
+    monkeypatch.setattr(cache_refresh, "get_active_subscribers", mock_get_subscribers)
+    monkeypatch.setattr(cache_refresh, "send_orange_to_red_alert", mock_send_alert)
+    mock_cache = mock_cache_factory(
+        last_valid_data=_last_valid_data(past_20m),
+        cached_fields=dict.fromkeys(_SCENARIO_FIELDS, False),
+        previous_risk_level="Orange",
+        risk_level_timestamp=None,
+        last_alerted_timestamp=None,
+        fire_risk_data={"risk": "Orange", "explanation": "explanation", "weather": dict(_SCENARIO_COMBINED)},
+        should_send_alert_for_transition=MagicMock(return_value=True),
+    )
+    monkeypatch.setattr(cache_refresh, "data_cache", mock_cache)
+
+    caplog.set_level(logging.INFO, logger='config')
+    for _ in range(2):
+        assert await refresh_data_cache(force=True) is True
+    await cache_refresh.wait_for_pending_alerts()
+
+    assert mock_get_subscribers.call_count == 1
+    assert mock_send_alert.call_count == 2
+    assert _log_fields(caplog, "risk_transition_from", "risk_transition_to") == [
+        {"risk_transition_from": "Orange", "risk_transition_to": "Red"}
+    ] * 2
+    # Both alerts report the cached subscriber list
+    assert _log_fields(caplog, "subscriber_count", "message_id") == [
+        {"subscriber_count": 1, "message_id": "mock-message-id"}
+    ] * 2
+
+    # Once the TTL has passed the subscribers are looked up again
+    looked_up_at, subscribers = cache_refresh._subscribers_cache
+    monkeypatch.setattr(cache_refresh, "_subscribers_cache", (looked_up_at - cache_refresh.SUBSCRIBERS_CACHE_TTL, subscribers))
+    assert await refresh_data_cache(force=True) is True
+    await cache_refresh.wait_for_pending_alerts()
+    assert mock_get_subscribers.call_count == 2
+
+
+async def test_schedule_next_refresh(monkeypatch, mock_cache_factory):
+    mock_refresh_data_cache = AsyncMock(return_value=True)
+    monkeypatch.setattr(cache_refresh, "refresh_data_cache", mock_refresh_data_cache)
+
+    # Use a fake DataCache
+    mock_cache = mock_cache_factory(refresh_task_active=True)
     
     # Patch the global data_cache instance
-    with patch('cache_refresh.data_cache', mock_cache):
-        with patch('cache_refresh.logger') as mock_logger:
-            await schedule_next_refresh(0.01)  # Schedule refresh after a short delay
-            mock_logger.info.assert_called_with("Scheduling next background refresh in 0.01 minutes")
-            
-        mock_refresh_data_cache.assert_awaited_once()
-        assert mock_cache.refresh_task_active is False
+    mock_logger = MagicMock()
+    monkeypatch.setattr(cache_refresh, "data_cache", mock_cache)
+    monkeypatch.setattr(cache_refresh, "logger", mock_logger)
+    await schedule_next_refresh(0.01)  # Schedule refresh after a short delay
+    mock_logger.info.assert_called_with("Scheduling next background refresh in 0.01 minutes")
+
+    mock_refresh_data_cache.assert_awaited_once()
+    assert mock_cache.refresh_task_active is False
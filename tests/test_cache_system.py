@@ -1,50 +1,88 @@
 import pytest
 import asyncio
+import copy
+import dataclasses
+import threading
 from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
 from unittest.mock import patch, MagicMock, AsyncMock
-from cache import DataCache, data_cache # Import the global instance
+from cache import DataCache, CircuitBreaker
 from cache_refresh import refresh_data_cache # Import the function to test
-from config import TIMEZONE # Import TIMEZONE
 
-@pytest.fixture
-def cache():
-    # Create a fresh cache instance for each test
-    # This ensures tests don't interfere with each other
-    # Reset the global instance before creating a new one for the test
-    global data_cache
-    data_cache = DataCache()
-    return data_cache
+# Fixed clock for the staleness tests
+NOW = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+# Previously valid data an hour old, for the refresh failure test. Deep-copy
+# before use - don't mutate.
+CACHE_TIMESTAMP = NOW - timedelta(hours=1)
+LAST_VALID_DATA = {
+    "fields": {
+        "temperature": {"value": 10.0, "timestamp": CACHE_TIMESTAMP},
+        "humidity": {"value": 50.0, "timestamp": CACHE_TIMESTAMP},
+        "wind_speed": {"value": 5.0, "timestamp": CACHE_TIMESTAMP},
+        "soil_moisture": {"value": 15.0, "timestamp": CACHE_TIMESTAMP},
+        "wind_gust": {"value": 8.0, "timestamp": CACHE_TIMESTAMP},
+    },
+    "timestamp": CACHE_TIMESTAMP,
+    "weather": {
+        "air_temp": 10.0,
+        "relative_humidity": 50.0,
+        "wind_speed": 5.0,
+        "soil_moisture_15cm": 15.0,
+        "wind_gust": 8.0
+    }
+}
 
 
-def test_is_stale_no_data(cache):
-    # Make sure last_updated is None to truly test this case
-    cache.last_updated = None
-    assert cache.is_stale() is True # Should be stale when last_updated is None
+@pytest.fixture(scope="module")
+def cache_prototype():
+    """One DataCache built (and loaded from disk) for the module; tests get copies."""
+    return DataCache()
 
 
-def test_is_stale_fresh_data(cache):
-    cache.last_updated = datetime.now(TIMEZONE) # Use TIMEZONE
-    assert cache.is_stale() is False
+@pytest.fixture
+def cache(cache_prototype):
+    # A fresh copy for each test, so tests don't interfere with each other.
+    # The lock and update event can't be deep-copied; each copy gets new ones.
+    memo = {
+        id(cache_prototype._lock): threading.Lock(),
+        id(cache_prototype._update_complete_event): asyncio.Event(),
+    }
+    return copy.deepcopy(cache_prototype, memo)
 
 
-def test_is_stale_old_data(cache):
-    cache.last_updated = datetime.now(TIMEZONE) - timedelta(minutes=30) # Use TIMEZONE
-    assert cache.is_stale() is True
+class TestStaleness:
+    """is_stale/is_critically_stale only read last_updated, so one cache serves the class."""
 
+    @pytest.fixture(scope="class")
+    def cache(self):
+        return DataCache()
 
-def test_is_critically_stale_no_data(cache):
-    # A freshly initialized cache should not be critically stale
-    assert cache.is_critically_stale() is False # Changed assertion
+    def test_is_stale_no_data(self, cache):
+        # Make sure last_updated is None to truly test this case
+        cache.last_updated = None
+        assert cache.is_stale() is True # Should be stale when last_updated is None
 
+    def test_is_stale_fresh_data(self, cache):
+        cache.last_updated = NOW
+        assert cache.is_stale(now=NOW) is False
 
-def test_is_critically_stale_fresh_data(cache):
-    cache.last_updated = datetime.now(TIMEZONE) # Use TIMEZONE
-    assert cache.is_critically_stale() is False
+    def test_is_stale_old_data(self, cache):
+        cache.last_updated = NOW - timedelta(minutes=30)
+        assert cache.is_stale(now=NOW) is True
 
+    def test_is_critically_stale_fresh_data(self, cache):
+        cache.last_updated = NOW
+        assert cache.is_critically_stale(now=NOW) is False
 
-def test_is_critically_stale_old_data(cache):
-    cache.last_updated = datetime.now(TIMEZONE) - timedelta(minutes=40)  # Older than the 30-minute threshold, use TIMEZONE
-    assert cache.is_critically_stale() is True
+    def test_is_critically_stale_old_data(self, cache):
+        cache.last_updated = NOW - timedelta(minutes=40)  # Older than the 30-minute threshold
+        assert cache.is_critically_stale(now=NOW) is True
+
+
+def test_is_critically_stale_no_data(cache):
+    # A freshly initialized cache should not be critically stale
+    assert cache.is_critically_stale() is False # Changed assertion
 
 
 def test_update_cache(cache):
@@ -80,46 +118,65 @@ def test_update_cache_with_none_data(cache):
     assert cache.last_valid_data["fire_risk_data"] == fire_risk_data
     assert cache.last_valid_data["timestamp"] is not None
 
-@pytest.mark.asyncio
 async def test_wait_for_update(cache):
 
-    # Simulate an update in a separate thread
-    async def update_cache_async():
-        await asyncio.sleep(0.1)  # Simulate some delay
-        cache.update_cache({}, {})
-
-    asyncio.create_task(update_cache_async())
+    # Simulate an update on the next loop iteration, once wait_for_update is
+    # already blocked on the event
+    asyncio.get_running_loop().call_soon(cache.update_cache, {}, {})
     assert await cache.wait_for_update() is True
 
 
-@pytest.mark.asyncio
 async def test_wait_for_update_timeout(cache):
     cache.update_timeout = 0.01  # Set a very short timeout
     assert await cache.wait_for_update() is False
 
 
 # Modifying to patch the asyncio event loop
-@patch('asyncio.get_event_loop')
-def test_reset_update_event(mock_get_event_loop, cache):
-    # Set up the mock event loop
-    mock_loop = MagicMock()
-    mock_get_event_loop.return_value = mock_loop
-    mock_loop.is_closed.return_value = False
+def test_reset_update_event(monkeypatch, cache):
+    # An open loop-like object; no loop is running in this sync test
+    fake_loop = SimpleNamespace(is_closed=lambda: False, call_soon_threadsafe=MagicMock())
+    monkeypatch.setattr(asyncio, "get_event_loop", lambda: fake_loop)
     
     # Call the method
     cache.reset_update_event()
     
     # Verify that call_soon_threadsafe was called with the clear method
-    mock_loop.call_soon_threadsafe.assert_called_once_with(cache._update_complete_event.clear)
+    fake_loop.call_soon_threadsafe.assert_called_once_with(cache._update_complete_event.clear)
 
 
-@pytest.mark.asyncio
-@patch('cache_refresh.get_synoptic_data', new_callable=AsyncMock)
+def test_fake_data_cache_matches_data_cache(cache, mock_cache_factory):
+    # Every attribute the test double declares must exist on the real cache
+    for fake_field in dataclasses.fields(mock_cache_factory):
+        assert hasattr(cache, fake_field.name), f"DataCache has no attribute {fake_field.name}"
+
+
+def test_circuit_breaker_half_open_trial():
+    # Zero break duration: every is_open() after opening starts a trial
+    breaker = CircuitBreaker(minimum_throughput=1, break_duration=0)
+    breaker.record(False)
+    assert breaker.is_open() is True
+
+    # The trial is let through, and its failure reopens the circuit at once
+    assert breaker.is_open() is False
+    assert breaker.half_open is True
+    breaker.record(False)
+    assert breaker.opened_at is not None
+
+    # A successful trial closes it
+    assert breaker.is_open() is False
+    breaker.record(True)
+    assert breaker.half_open is False
+    assert breaker.opened_at is None
+    assert breaker.is_open() is False
+
+
+@patch('cache_refresh.get_synoptic_data')
 @patch('cache_refresh.format_age_string')
-async def test_refresh_failure_sets_cached_flag(mock_format_age, mock_synoptic):
+async def test_refresh_failure_sets_cached_flag(mock_format_age, mock_synoptic, mock_cache_factory):
     """
-    Test that if API calls fail during refresh, the cache falls back
-    and correctly sets the using_cached_data flag with all required fields.
+    Test that if API calls fail during refresh, the circuit breaker opens, the
+    refresh reports failure, and the cache falls back to the last valid data
+    with the using_cached_data flag and all required fields set.
     """
     # --- Setup ---
     # Set up mocked age string
@@ -128,116 +185,56 @@ async def test_refresh_failure_sets_cached_flag(mock_format_age, mock_synoptic):
     # Simulate API failures
     mock_synoptic.return_value = None
 
-    # Create timestamp for cache data
-    cache_timestamp = datetime.now(TIMEZONE) - timedelta(hours=1)
-    
     # Create a mock DataCache instance for this test
-    mock_cache = MagicMock(spec=DataCache)
-    mock_cache.last_valid_data = { # Simulate some previously valid data
-        "fields": {
-            "temperature": {"value": 10.0, "timestamp": cache_timestamp},
-            "humidity": {"value": 50.0, "timestamp": cache_timestamp},
-            "wind_speed": {"value": 5.0, "timestamp": cache_timestamp},
-            "soil_moisture": {"value": 15.0, "timestamp": cache_timestamp},
-            "wind_gust": {"value": 8.0, "timestamp": cache_timestamp},
-        },
-        "timestamp": cache_timestamp,
-        "weather": {
-            "air_temp": 10.0,
-            "relative_humidity": 50.0,
-            "wind_speed": 5.0,
-            "soil_moisture_15cm": 15.0,
-            "wind_gust": 8.0
+    mock_cache = mock_cache_factory(
+        cached_fields={"temperature": False, "humidity": False, "wind_speed": False, "soil_moisture": False, "wind_gust": False},
+        using_cached_data=False,
+    )
+    mock_cache.last_valid_data = copy.deepcopy(LAST_VALID_DATA) # Simulate some previously valid data
+    mock_cache.fire_risk_data = {"risk": "Initial", "weather": dict(LAST_VALID_DATA["weather"])} # Initial state
+
+    # Replace ensure_complete_weather_data with a plain function that fills
+    # every field from last_valid_data, as the real method does when the API
+    # returns nothing
+    def fake_ensure(weather_data):
+        fields = mock_cache.last_valid_data["fields"]
+        for field in fields:
+            mock_cache.cached_fields[field] = True
+        return {
+            "air_temp": fields["temperature"]["value"],
+            "relative_humidity": fields["humidity"]["value"],
+            "wind_speed": fields["wind_speed"]["value"],
+            "soil_moisture_15cm": fields["soil_moisture"]["value"],
+            "wind_gust": fields["wind_gust"]["value"]
         }
-    }
-    # Initialize other necessary attributes for the mock
-    mock_cache.update_in_progress = False
-    mock_cache.reset_update_event = MagicMock()
-    mock_cache.max_retries = 3
-    mock_cache.update_timeout = 10
-    mock_cache.retry_delay = 0.01 # Short delay for testing retries
-    mock_cache.cached_fields = {"temperature": False, "humidity": False, "wind_speed": False, "soil_moisture": False, "wind_gust": False}
-    mock_cache.using_cached_data = False
-    mock_cache.fire_risk_data = {
-        "risk": "Initial", 
-        "weather": {
-            "air_temp": 10.0,
-            "relative_humidity": 50.0,
-            "wind_speed": 5.0,
-            "soil_moisture_15cm": 15.0,
-            "wind_gust": 8.0
-        }
-    } # Initial state
-
-    # Patch the global data_cache instance used by cache_refresh
-    with patch('cache_refresh.data_cache', mock_cache):
-        # Patch combine_weather_data to simulate it returning None values due to API failures
-        with patch('cache_refresh.combine_weather_data', return_value={"air_temp": None, "relative_humidity": None, "wind_speed": None, "soil_moisture_15cm": None, "wind_gust": None}):
-            # Patch ensure_complete_weather_data to simulate fallback logic
-            # It should use the mock_cache's last_valid_data
-            def mock_ensure(weather_data):
-                # Simulate filling from last_valid_data and setting flags
-                mock_cache.cached_fields["temperature"] = True
-                mock_cache.cached_fields["humidity"] = True
-                mock_cache.cached_fields["wind_speed"] = True
-                mock_cache.cached_fields["soil_moisture"] = True
-                mock_cache.cached_fields["wind_gust"] = True
-                mock_cache.using_cached_data = True
-                return {
-                    "air_temp": mock_cache.last_valid_data["fields"]["temperature"]["value"],
-                    "relative_humidity": mock_cache.last_valid_data["fields"]["humidity"]["value"],
-                    "wind_speed": mock_cache.last_valid_data["fields"]["wind_speed"]["value"],
-                    "soil_moisture_15cm": mock_cache.last_valid_data["fields"]["soil_moisture"]["value"],
-                    "wind_gust": mock_cache.last_valid_data["fields"]["wind_gust"]["value"]
-                }
-            mock_cache.ensure_complete_weather_data.side_effect = mock_ensure
-            
-            # Mock calculate_fire_risk to return predictable results
-            with patch('cache_refresh.calculate_fire_risk', return_value=("Low", "Fire risk is low")):
-                # Setup updateable fire_risk_data with cached_data fields
-                def update_cache_side_effect(synoptic_data, fire_risk_data):
-                    # Add cached_data field to fire_risk_data
-                    fire_risk_data["cached_data"] = {
-                        "is_cached": True,
-                        "original_timestamp": cache_timestamp.isoformat(),
-                        "age": "1 hour old",
-                        "cached_fields": mock_cache.cached_fields.copy()
-                    }
-                    
-                    # Add cached_fields to weather data
-                    fire_risk_data["weather"]["cached_fields"] = {
-                        "timestamp": {
-                            "temperature": cache_timestamp,
-                            "humidity": cache_timestamp,
-                            "wind_speed": cache_timestamp,
-                            "soil_moisture": cache_timestamp,
-                            "wind_gust": cache_timestamp
-                        }
-                    }
-                    
-                    # Add modal content
-                    fire_risk_data["modal_content"] = {
-                        "note": "Displaying cached weather data. Current data is unavailable.",
-                        "warning_title": "Using Cached Data",
-                        "warning_issues": ["Unable to fetch fresh data from weather APIs."]
-                    }
-                    
-                    # Update mock_cache.fire_risk_data
-                    mock_cache.fire_risk_data = fire_risk_data
-                
-                mock_cache.update_cache.side_effect = update_cache_side_effect
-                
-                # --- Action ---
-                # Trigger the refresh function
-                success = await refresh_data_cache()
+    mock_cache.ensure_complete_weather_data = fake_ensure
+
+    # Patch the global data_cache instance used by cache_refresh. combine_weather_data
+    # returns None values to simulate API failures; calculate_fire_risk is predictable.
+    # Retry backoffs return at once.
+    with patch('cache_refresh.asyncio.sleep', new_callable=AsyncMock), patch.multiple(
+        'cache_refresh',
+        data_cache=mock_cache,
+        combine_weather_data=MagicMock(return_value={"air_temp": None, "relative_humidity": None, "wind_speed": None, "soil_moisture_15cm": None, "wind_gust": None}),
+        calculate_fire_risk=MagicMock(return_value=("Low", "Fire risk is low", {})),
+    ):
+        # --- Action ---
+        # Trigger the refresh function
+        success = await refresh_data_cache()
 
     # --- Assertions ---
-    # In the current implementation, refresh returns True when it successfully processes data,
-    # even if it's using cached values
-    assert success is True, "Refresh should return True when processing is successful"
-    
-    # Check the flag on the *mock* instance
-    assert mock_cache.last_update_success is True, "Cache's last update success flag should be True when processing is successful"
+    # A failed fetch doesn't use up a retry; the API is called until the
+    # circuit breaker has seen enough failures to open
+    assert mock_synoptic.call_count == mock_cache.circuit.minimum_throughput
+    assert mock_cache.circuit.is_open() is True
+
+    # No fresh data was obtained, so the refresh failed and nothing new was stored
+    assert success is False
+    assert mock_cache.last_update_success is False
+    mock_cache.update_cache.assert_not_called()
+    assert mock_cache.fire_risk_data["risk"] == "Initial"
+    # Callers waiting on the refresh are still woken
+    mock_cache.set_update_event.assert_called_once_with()
 
     # Crucial check: Verify the cache knows it's using fallback data
     assert mock_cache.using_cached_data is True, "using_cached_data flag should be True after fallback"
@@ -247,23 +244,22 @@ async def test_refresh_failure_sets_cached_flag(mock_format_age, mock_synoptic):
         assert mock_cache.cached_fields[field] is True, f"{field} should be marked as cached"
     
     # Verify the fire_risk_data was updated with proper cache indicators
-    assert "cached_data" in mock_cache.fire_risk_data, "cached_data should be added to fire_risk_data"
-    assert mock_cache.fire_risk_data["cached_data"]["is_cached"] is True
-    assert mock_cache.fire_risk_data["cached_data"]["age"] == "1 hour old"
-    assert "cached_fields" in mock_cache.fire_risk_data["cached_data"]
-    
-    # Verify weather data has cached_fields structure
-    assert "cached_fields" in mock_cache.fire_risk_data["weather"], "cached_fields should be in weather data"
-    assert "timestamp" in mock_cache.fire_risk_data["weather"]["cached_fields"], "timestamp should be in cached_fields"
+    assert mock_cache.fire_risk_data["cached_data"] == {
+        "is_cached": True,
+        "original_timestamp": CACHE_TIMESTAMP.isoformat(),
+        "age": "1 hour old",
+        "cached_fields": mock_cache.cached_fields,
+    }
     
-    # Verify each field has a timestamp
-    timestamp_field = mock_cache.fire_risk_data["weather"]["cached_fields"]["timestamp"]
+    # Verify each weather field is flagged as cached with its last valid timestamp
+    weather_cached_fields = mock_cache.fire_risk_data["weather"]["cached_fields"]
     for field in ["temperature", "humidity", "wind_speed", "soil_moisture", "wind_gust"]:
-        assert field in timestamp_field, f"{field} timestamp should be present"
+        assert weather_cached_fields[field] is True
+        assert weather_cached_fields["timestamp"][field] == CACHE_TIMESTAMP.isoformat()
     
     # Verify modal content
-    assert "modal_content" in mock_cache.fire_risk_data, "modal_content should be added"
-    assert "note" in mock_cache.fire_risk_data["modal_content"]
-    assert "Displaying cached weather data" in mock_cache.fire_risk_data["modal_content"]["note"]
-    assert "warning_title" in mock_cache.fire_risk_data["modal_content"]
-    assert "warning_issues" in mock_cache.fire_risk_data["modal_content"]
+    assert mock_cache.fire_risk_data["modal_content"] == {
+        "note": "Displaying cached weather data. Current data is unavailable.",
+        "warning_title": "Using Cached Data",
+        "warning_issues": ["Unable to fetch fresh data from weather APIs."],
+    }
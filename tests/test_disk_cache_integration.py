@@ -9,7 +9,7 @@ from unittest.mock import patch, MagicMock, AsyncMock
 from fastapi.testclient import TestClient
 from main import app
 from cache import DataCache, data_cache
-from config import TIMEZONE
+from config import TIMEZONE, WEATHER_CACHE_FILE
 
 client = TestClient(app)
 
@@ -18,7 +18,7 @@ def setup_disk_cache():
     """Setup a test disk cache and clean up after."""
     # Create test directory
     cache_dir = Path("data")
-    cache_file = cache_dir / "weather_cache.json"
+    cache_file = cache_dir / WEATHER_CACHE_FILE
     
     # Remember original cache file if it exists
     original_exists = cache_file.exists()
@@ -71,8 +71,7 @@ def setup_disk_cache():
             os.remove(cache_file)
 
 
-@pytest.mark.asyncio
-async def test_disk_cache_loading_on_startup(setup_disk_cache):
+def test_disk_cache_loading_on_startup(setup_disk_cache):
     """Test that the disk cache is loaded on startup."""
     # Create a new cache instance (simulating startup)
     cache = DataCache()
@@ -94,8 +93,7 @@ async def test_disk_cache_loading_on_startup(setup_disk_cache):
     assert cache.last_valid_data["fields"]["wind_gust"]["value"] == expected_wind_gust
 
 
-@pytest.mark.asyncio
-async def test_cache_persistence(setup_disk_cache):
+def test_cache_persistence(setup_disk_cache):
     """Test that the cache persists changes to disk."""
     # Create a new cache instance with the initial disk data
     cache = DataCache()
@@ -112,8 +110,7 @@ async def test_cache_persistence(setup_disk_cache):
     assert cache.get_field_value("temperature") == new_temp
 
 
-@pytest.mark.asyncio
-async def test_four_level_fallback_with_disk(setup_disk_cache):
+def test_four_level_fallback_with_disk(setup_disk_cache):
     """Test the complete 4-level fallback system."""
     # Create a new cache instance
     cache = DataCache()
@@ -147,8 +144,7 @@ async def test_four_level_fallback_with_disk(setup_disk_cache):
     assert cache.get_field_value("temperature") == DataCache.DEFAULT_VALUES["temperature"]
 
 
-@pytest.mark.asyncio
-async def test_ensuring_complete_data_with_disk_cache(setup_disk_cache):
+def test_ensuring_complete_data_with_disk_cache(setup_disk_cache):
     """Test that ensure_complete_weather_data fills missing values from disk cache or defaults."""
     # Create a new cache instance with disk-loaded data
     cache = DataCache()
@@ -1,58 +1,48 @@
 import unittest
-from unittest.mock import patch, MagicMock
+from unittest.mock import DEFAULT, patch, MagicMock
 import asyncio
 import pytest
 from datetime import datetime, timedelta
 
 # Import the modules we need to test
-from cache_refresh import refresh_data_cache
+from cache_refresh import refresh_data_cache, wait_for_pending_alerts
 from email_service import send_orange_to_red_alert
 from subscriber_service import get_active_subscribers
 from config import TIMEZONE
+from tests.mock_utils import RED_RISK_RESULT, configure_refresh_cache
 
 class TestOrangeToRedEmailAlert(unittest.TestCase):
     """Test the Orange to Red email alert functionality."""
 
-    @patch('cache_refresh.get_active_subscribers')
-    @patch('cache_refresh.send_orange_to_red_alert')
-    @patch('cache_refresh.calculate_fire_risk')
-    @patch('cache_refresh.get_synoptic_data')
-    @patch('cache_refresh.data_cache')
-    def test_orange_to_red_transition_sends_email(self, mock_data_cache, mock_get_synoptic_data, 
-                                                mock_calculate_risk, mock_send_alert, 
-                                                mock_get_subscribers):
+    @patch.multiple(
+        'cache_refresh',
+        get_active_subscribers=DEFAULT,
+        send_orange_to_red_alert=DEFAULT,
+        calculate_fire_risk=DEFAULT,
+        get_synoptic_data=DEFAULT,
+        data_cache=DEFAULT,
+    )
+    def test_orange_to_red_transition_sends_email(self, **mocks):
         """Test that an Orange to Red transition triggers an email alert."""
+        mock_data_cache = mocks['data_cache']
+        mock_get_synoptic_data = mocks['get_synoptic_data']
+        mock_calculate_risk = mocks['calculate_fire_risk']
+        mock_send_alert = mocks['send_orange_to_red_alert']
+        mock_get_subscribers = mocks['get_active_subscribers']
         # Set up required mock attributes
-        mock_data_cache.update_in_progress = False
-        mock_data_cache.previous_risk_level = "Orange"
-        mock_data_cache.risk_level_timestamp = datetime.now(TIMEZONE) - timedelta(hours=1)
-        mock_data_cache.last_alerted_timestamp = None
-        mock_data_cache.max_retries = 5
-        mock_data_cache.retry_delay = 0
-        mock_data_cache.update_timeout = 15
-        mock_data_cache.refresh_task_active = False
-        mock_data_cache.using_cached_data = False
-        mock_data_cache.cached_fields = {"temperature": False, "humidity": False, "wind_speed": False, "soil_moisture": False}
-        
-        # Mock the methods
-        mock_data_cache.reset_update_event = MagicMock()
-        mock_data_cache.update_cache = MagicMock()
-        mock_data_cache.should_send_alert_for_transition = MagicMock(return_value=True)
-        mock_data_cache.record_alert_sent = MagicMock()
-        mock_data_cache.update_risk_level = MagicMock()
-        mock_data_cache.ensure_complete_weather_data.return_value = {
-            "air_temp": 32,
-            "relative_humidity": 12,
-            "wind_speed": 25,
-            "wind_gust": 35,
-            "soil_moisture_15cm": 8
-        }
+        configure_refresh_cache(
+            mock_data_cache,
+            previous_risk_level="Orange",
+            risk_level_timestamp=datetime.now(TIMEZONE) - timedelta(hours=1),
+            last_alerted_timestamp=None,
+        )
+        mock_data_cache.should_send_alert_for_transition.return_value = True
         
         # Mock get_synoptic_data to return sample weather data
         mock_get_synoptic_data.return_value = {"data": "sample"}
         
         # Mock calculate_fire_risk to return "Red" risk level
-        mock_calculate_risk.return_value = ("Red", "High temperature and low humidity")
+        mock_calculate_risk.return_value = RED_RISK_RESULT
         
         # Mock get_active_subscribers to return sample subscribers
         mock_get_subscribers.return_value = {"subscribers": ["test@example.com"]}
@@ -62,7 +52,10 @@ class TestOrangeToRedEmailAlert(unittest.TestCase):
         
         # Set up the async function to be called synchronously
         async def run_refresh():
-            return await refresh_data_cache()
+            result = await refresh_data_cache()
+            # The alert email is sent in the background
+            await wait_for_pending_alerts()
+            return result
             
         # Run the async function in an event loop
         loop = asyncio.new_event_loop()
@@ -84,7 +77,7 @@ class TestOrangeToRedEmailAlert(unittest.TestCase):
         self.assertIn('wind_speed', alert_args[1])
         
         # Verify our methods were called correctly
-        mock_data_cache.should_send_alert_for_transition.assert_called_once_with("Red")
+        mock_data_cache.should_send_alert_for_transition.assert_called_once_with("Red", ignore_daily_limit=False)
         mock_data_cache.record_alert_sent.assert_called_once()
         mock_data_cache.update_risk_level.assert_called_once_with("Red")
 
@@ -13,7 +13,7 @@ with patch.dict(os.environ, {
     'DASHBOARD_URL': 'http://test-dashboard.local'
 }):
     # Import functions and objects needed for testing
-    from email_service import send_test_email, send_email, send_orange_to_red_alert, ses_client, jinja_env
+    from email_service import send_test_email, send_email, send_orange_to_red_alert, jinja_env
 
 # --- Test Data ---
 SENDER_TEST = "test_sender@example.com"
@@ -42,9 +42,10 @@ def mock_ses_client_fixture():
     # We need to mock the client *within* the email_service module
     """Automatically mock the ses_client for all tests in this module."""
     # We need to mock the client *within* the email_service module
-    with patch('email_service.ses_client', new_callable=MagicMock) as mock_client:
-        # Configure default success response for send_email
-        mock_client.send_email.return_value = {'MessageId': EXPECTED_MESSAGE_ID}
+    mock_client = MagicMock()
+    # Configure default success response for send_email
+    mock_client.send_email.return_value = {'MessageId': EXPECTED_MESSAGE_ID}
+    with patch('email_service.get_ses_client', return_value=mock_client):
         yield mock_client
 
 @pytest.fixture
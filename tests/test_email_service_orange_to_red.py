@@ -3,7 +3,6 @@ import asyncio
 from unittest.mock import patch, MagicMock, AsyncMock
 from datetime import datetime, timedelta, timezone
 from cache_refresh import refresh_data_cache
-from cache import DataCache
 from email_service import send_test_email
 
 
@@ -13,7 +12,7 @@ from email_service import send_test_email
 @patch('cache_refresh.combine_weather_data')
 @patch('cache_refresh.calculate_fire_risk')
 async def test_orange_to_red_alert_email(mock_calculate_fire_risk, mock_combine_weather_data, 
-                                        mock_get_synoptic_data, mock_send_test_email):
+                                        mock_get_synoptic_data, mock_send_test_email, mock_cache_factory):
     """Test that an email is sent when risk level transitions from Orange to Red."""
     
     # Mock weather data and API calls
@@ -34,14 +33,7 @@ async def test_orange_to_red_alert_email(mock_calculate_fire_risk, mock_combine_
     mock_calculate_fire_risk.return_value = ("Red", "High fire risk due to all thresholds being exceeded.")
     
     # Create a mock DataCache instance with previous_risk_level set to "Orange"
-    mock_cache = MagicMock(spec=DataCache)
-    mock_cache.update_in_progress = False
-    mock_cache.reset_update_event = MagicMock()
-    mock_cache.max_retries = 3
-    mock_cache.update_timeout = 10
-    mock_cache.retry_delay = 0
-    mock_cache.cached_fields = {}
-    mock_cache.previous_risk_level = "Orange"  # Set previous risk level to Orange
+    mock_cache = mock_cache_factory(retry_delay=0, previous_risk_level="Orange")  # Set previous risk level to Orange
     
     # Patch the global data_cache instance
     with patch('cache_refresh.data_cache', mock_cache):
@@ -77,7 +69,7 @@ async def test_orange_to_red_alert_email(mock_calculate_fire_risk, mock_combine_
 @patch('cache_refresh.combine_weather_data')
 @patch('cache_refresh.calculate_fire_risk')
 async def test_no_email_for_other_transitions(mock_calculate_fire_risk, mock_combine_weather_data,
-                                             mock_get_synoptic_data, mock_send_test_email):
+                                             mock_get_synoptic_data, mock_send_test_email, mock_cache_factory):
     """Test that no email is sent for transitions other than Orange to Red."""
     
     # Test cases for different transitions that should NOT trigger emails
@@ -111,14 +103,7 @@ async def test_no_email_for_other_transitions(mock_calculate_fire_risk, mock_com
         mock_calculate_fire_risk.return_value = (new_risk, f"Test risk level: {new_risk}")
         
         # Create a mock DataCache instance with specified previous_risk_level
-        mock_cache = MagicMock(spec=DataCache)
-        mock_cache.update_in_progress = False
-        mock_cache.reset_update_event = MagicMock()
-        mock_cache.max_retries = 3
-        mock_cache.update_timeout = 10
-        mock_cache.retry_delay = 0
-        mock_cache.cached_fields = {}
-        mock_cache.previous_risk_level = prev_risk  # Set previous risk level
+        mock_cache = mock_cache_factory(retry_delay=0, previous_risk_level=prev_risk)  # Set previous risk level
         
         # Patch the global data_cache instance
         with patch('cache_refresh.data_cache', mock_cache):
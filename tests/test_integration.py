@@ -9,8 +9,8 @@ from datetime import datetime, timedelta
 # Removed app import, assuming it's available via client fixture context
 from cache import data_cache
 from config import TIMEZONE
-# Use TEST_STATION_IDS from conftest for tests
-from tests.conftest import TEST_STATION_IDS
+# Use TEST_STATION_IDS from the shared mock utilities
+from tests.mock_utils import TEST_STATION_IDS
 
 # Removed local client = TestClient(app)
 
@@ -43,8 +43,12 @@ SAMPLE_FIRE_RISK_DATA = {
 
 
 @pytest.fixture(autouse=True)
-async def reset_cache():
-    """Reset the cache before each test."""
+async def reset_cache(reset_cache):
+    """Reset the cache before each test.
+
+    Builds on conftest's reset_cache, which restores the original cache state
+    afterwards so the emptied cache doesn't leak into other test modules.
+    """
     # Reset cache state manually
     data_cache.synoptic_data = None
     data_cache.wunderground_data = None
@@ -102,9 +106,10 @@ async def test_initial_cache_empty(mock_refresh, client): # Added client fixture
 @patch('endpoints.refresh_data_cache', new_callable=AsyncMock)
 async def test_cache_stale_refresh_background(mock_refresh, client): # Added client fixture
     """Test /fire-risk triggers background refresh when cache is stale."""
-    # Setup: Populate cache and make it stale
+    # Setup: Populate cache and make it stale, but not critically stale
     data_cache.fire_risk_data = SAMPLE_FIRE_RISK_DATA.copy()
     data_cache.last_updated = datetime.now(TIMEZONE) - timedelta(minutes=90) # Stale
+    data_cache.data_timeout_threshold = 120 # minutes; restored by reset_cache
     data_cache.last_update_success = True
 
     # Configure mock refresh (won't be awaited by endpoint in this case)
@@ -155,6 +160,36 @@ async def test_wait_for_fresh(mock_refresh, client): # Added client fixture
     assert datetime.fromisoformat(data["cache_info"]["last_updated"]) > stale_time
 
 
+@pytest.mark.asyncio
+@pytest.mark.parametrize("refresh_in_progress", [False, True])
+@patch('endpoints.refresh_data_cache', new_callable=AsyncMock)
+async def test_wait_for_fresh_refresh_failed(mock_refresh, client, refresh_in_progress):
+    """A failed refresh is reported as wait_for_fresh_timed_out even though it wakes the waiters."""
+    data_cache.fire_risk_data = SAMPLE_FIRE_RISK_DATA.copy()
+    data_cache.last_updated = datetime.now(TIMEZONE) - timedelta(minutes=90)
+    data_cache.update_in_progress = refresh_in_progress
+
+    async def side_effect(*args, **kwargs):
+        # Like refresh_data_cache, fall back to cached data and wake waiters
+        # whether or not the refresh succeeded
+        data_cache.last_update_success = False
+        data_cache.using_cached_data = True
+        data_cache._update_complete_event.set()
+        return False
+    mock_refresh.side_effect = side_effect
+    if refresh_in_progress:
+        # The other refresh has already failed
+        await side_effect()
+
+    response = await client.get("/fire-risk?wait_for_fresh=true")
+
+    assert response.status_code == 200
+    assert mock_refresh.call_count == (0 if refresh_in_progress else 1)
+    cache_info = response.json()["cache_info"]
+    assert cache_info["wait_for_fresh_timed_out"] is True
+    assert cache_info["using_cached_data"] is True
+
+
 @pytest.mark.asyncio
 @patch('endpoints.refresh_data_cache', new_callable=AsyncMock)
 async def test_test_mode_toggle(mock_refresh, client): # Added client fixture
@@ -200,57 +235,44 @@ async def test_test_mode_toggle(mock_refresh, client): # Added client fixture
 # --- refresh_data_cache Integration Tests (Mocking API Clients) ---
 
 @pytest.mark.asyncio
-async def test_api_client_integration():
+async def test_api_client_integration(mock_cache_factory):
     """Test integration within refresh_data_cache using mocked API clients."""
-    # Mock the API clients to return minimal valid data structure
+    # Mock the API client to return minimal valid data structure
     synoptic_data = {
         "STATION": [{"STID": "CEYC1", "OBSERVATIONS": {}}]
     }
-    wunderground_data = {
-        station_id: {"observations": [{"imperial": {}}]} for station_id in TEST_STATION_IDS
-    }
 
-    # Setup the mock functions
-    async def mock_synoptic_function():
-        return synoptic_data
+    # get_synoptic_data is a blocking call run in the thread pool, so a plain mock
+    mock_synoptic_data = MagicMock(return_value=synoptic_data)
+
+    from cache_refresh import refresh_data_cache
+    mock_background_tasks = Mock(spec=BackgroundTasks)
     
-    async def mock_wunderground_function():
-        return wunderground_data
-        
-    # Create proper AsyncMock objects
-    mock_synoptic_data = AsyncMock()
-    mock_synoptic_data.return_value = synoptic_data
-    mock_wunderground_data = AsyncMock()
-    mock_wunderground_data.return_value = wunderground_data
-
-    # Patch the actual API client functions within the cache_refresh module
-    with patch('cache_refresh.get_synoptic_data', mock_synoptic_data), \
-         patch('cache_refresh.get_wunderground_data', mock_wunderground_data):
-
-        from cache_refresh import refresh_data_cache
-        mock_background_tasks = Mock(spec=BackgroundTasks)
-        
-        # Create a mock DataCache to avoid any issues with the real instance
-        mock_cache = MagicMock(spec=data_cache.__class__)
-        mock_cache.max_retries = 2
-        mock_cache.retry_delay = 0.01
-        mock_cache.update_timeout = 1
-        
-        # Patch the global data_cache instance
-        with patch('cache_refresh.data_cache', mock_cache):
-            # Execute the function under test
-            success = await refresh_data_cache(background_tasks=mock_background_tasks, force=True)
-
-            # Assertions
-            assert success is True
-            mock_synoptic_data.assert_called_once()
-            mock_wunderground_data.assert_called_once()
-            assert mock_cache.update_cache.called  # Check that update_cache was called
-            assert mock_cache.last_update_success is True
+    # Use a fake DataCache to avoid any issues with the real instance. The
+    # stations report no observations, so the cache fills in every field.
+    mock_cache = mock_cache_factory(max_retries=2, retry_delay=0.01, update_timeout=1)
+    mock_cache.ensure_complete_weather_data.return_value = dict(SAMPLE_FIRE_RISK_DATA["weather"])
+
+    # Patch the API client function and the global data_cache instance within
+    # the cache_refresh module
+    with patch.multiple(
+        'cache_refresh',
+        get_synoptic_data=mock_synoptic_data,
+        data_cache=mock_cache,
+    ):
+        # Execute the function under test
+        success = await refresh_data_cache(background_tasks=mock_background_tasks, force=True)
+
+    # Assertions
+    assert success is True
+    mock_synoptic_data.assert_called_once_with()
+    mock_cache.update_cache.assert_called_once()
+    assert mock_cache.update_cache.call_args.args[0] == synoptic_data
+    assert mock_cache.last_update_success is True
 
 
 @pytest.mark.asyncio
-async def test_data_processing_integration():
+async def test_data_processing_integration(mock_cache_factory):
     """Test data processing integration within refresh_data_cache."""
     # Mock API responses with specific data
     mock_synoptic_response = {
@@ -263,68 +285,56 @@ async def test_data_processing_integration():
                 "soil_moisture_value_1": {"value": 35.7}}} # Use a key process_synoptic expects
         ]
     }
-    mock_wunderground_response = {
-        station_id: {"observations": [{"imperial": {"windGust": 20.1}}]}
-        for station_id in TEST_STATION_IDS
-    }
     
-    # Create proper AsyncMock objects
-    mock_synoptic_data = AsyncMock()
-    mock_synoptic_data.return_value = mock_synoptic_response
-    mock_wunderground_data = AsyncMock()
-    mock_wunderground_data.return_value = mock_wunderground_response
-
-    # Patch the actual API client functions within the cache_refresh module
-    with patch('cache_refresh.get_synoptic_data', mock_synoptic_data), \
-         patch('cache_refresh.get_wunderground_data', mock_wunderground_data):
-
-        from cache_refresh import refresh_data_cache
-        from fire_risk_logic import calculate_fire_risk
-        
-        # Create weather data dictionary with expected values
-        expected_weather = {
-            "air_temp": 25.5,
-            "relative_humidity": 60.2,
-            "wind_speed": 15.3,
-            "soil_moisture_15cm": 35.7,
-            "wind_gust": 20.1,
-            "data_sources": {
-                "weather_station": "CEYC1",
-                "soil_moisture_station": "C3DLA",
-                "wind_gust_station": list(TEST_STATION_IDS)[0]
-            }
-        }
-        
-        # Calculate expected fire risk
-        expected_risk, expected_explanation = calculate_fire_risk(expected_weather)
-        expected_risk_data = {
-            "risk": expected_risk,
-            "explanation": expected_explanation,
-            "weather": expected_weather
+    # get_synoptic_data is a blocking call run in the thread pool, so a plain mock
+    mock_synoptic_data = MagicMock(return_value=mock_synoptic_response)
+
+    from cache_refresh import refresh_data_cache
+    from fire_risk_logic import calculate_fire_risk
+    
+    # Create weather data dictionary with expected values
+    expected_weather = {
+        "air_temp": 25.5,
+        "relative_humidity": 60.2,
+        "wind_speed": 15.3,
+        "soil_moisture_15cm": 35.7,
+        "wind_gust": 20.1,
+        "data_sources": {
+            "weather_station": "CEYC1",
+            "soil_moisture_station": "C3DLA",
+            "wind_gust_station": list(TEST_STATION_IDS)[0]
         }
-        
-        # Create a mock DataCache to avoid any issues with the real instance
-        mock_cache = MagicMock(spec=data_cache.__class__)
-        mock_cache.max_retries = 2
-        mock_cache.retry_delay = 0.01
-        mock_cache.update_timeout = 1
-        mock_cache.fire_risk_data = expected_risk_data
-        
-        # Patch combine_weather_data to return our expected_weather
-        with patch('cache_refresh.combine_weather_data', return_value=expected_weather):
-            # Patch the global data_cache instance
-            with patch('cache_refresh.data_cache', mock_cache):
-                # Execute the function under test
-                mock_background_tasks = Mock(spec=BackgroundTasks)
-                success = await refresh_data_cache(background_tasks=mock_background_tasks, force=True)
-                
-                # Assertions
-                assert success is True
-                mock_synoptic_data.assert_called_once()
-                mock_wunderground_data.assert_called_once()
-                assert mock_cache.update_cache.called  # Check that update_cache was called
-                
-                # Check the mock_cache object has been updated with our expected data
-                # Since it's a MagicMock, we don't actually check values - they'd just return the MagicMock
-                # But we can check that certain methods were called
-                mock_cache.update_cache.assert_called()
+    }
+    
+    # Calculate expected fire risk
+    expected_risk, expected_explanation, _ = calculate_fire_risk(expected_weather)
+    expected_risk_data = {
+        "risk": expected_risk,
+        "explanation": expected_explanation,
+        "weather": expected_weather
+    }
+    
+    # Use a fake DataCache to avoid any issues with the real instance. Every
+    # field has a value, so completing the weather data leaves it unchanged.
+    mock_cache = mock_cache_factory(max_retries=2, retry_delay=0.01, update_timeout=1)
+    mock_cache.ensure_complete_weather_data.side_effect = lambda weather: weather
+    
+    # Patch the API client function and the global data_cache instance within the
+    # cache_refresh module, and have combine_weather_data return our expected_weather
+    with patch.multiple(
+        'cache_refresh',
+        get_synoptic_data=mock_synoptic_data,
+        combine_weather_data=MagicMock(return_value=expected_weather),
+        data_cache=mock_cache,
+    ):
+        # Execute the function under test
+        mock_background_tasks = Mock(spec=BackgroundTasks)
+        success = await refresh_data_cache(background_tasks=mock_background_tasks, force=True)
+    
+    # Assertions
+    assert success is True
+    mock_synoptic_data.assert_called_once_with()
+    
+    # The processed weather data and the risk calculated from it are stored
+    mock_cache.update_cache.assert_called_once_with(mock_synoptic_response, expected_risk_data)
+    mock_cache.update_risk_level.assert_called_once_with(expected_risk)
@@ -1,12 +1,13 @@
 import unittest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch
 import asyncio
 from datetime import datetime, timedelta
 import pytest
 
 from cache import DataCache
 from config import TIMEZONE
-from cache_refresh import refresh_data_cache
+from cache_refresh import refresh_data_cache, wait_for_pending_alerts
+from tests.mock_utils import RED_RISK_RESULT, configure_refresh_cache
 
 
 class TestOrangeToRedAlertCalendarLimitIntegration(unittest.TestCase):
@@ -23,44 +24,30 @@ class TestOrangeToRedAlertCalendarLimitIntegration(unittest.TestCase):
         """Test multiple Orange to Red transitions on the same day - only first triggers email."""
         # Set up required mock attributes
         current_time = datetime.now(TIMEZONE)
-        mock_data_cache.update_in_progress = False
-        mock_data_cache.previous_risk_level = "Orange"
-        mock_data_cache.risk_level_timestamp = current_time - timedelta(hours=3)
-        mock_data_cache.last_alerted_timestamp = current_time - timedelta(hours=2)
-        mock_data_cache.max_retries = 5
-        mock_data_cache.retry_delay = 0
-        mock_data_cache.update_timeout = 15
-        mock_data_cache.refresh_task_active = False
-        mock_data_cache.using_cached_data = False
-        mock_data_cache.cached_fields = {"temperature": False, "humidity": False, "wind_speed": False, "soil_moisture": False}
-        
-        # Mock the methods
-        mock_data_cache.reset_update_event = MagicMock()
-        mock_data_cache.update_cache = MagicMock()
+        configure_refresh_cache(
+            mock_data_cache,
+            previous_risk_level="Orange",
+            risk_level_timestamp=current_time - timedelta(hours=3),
+            last_alerted_timestamp=current_time - timedelta(hours=2),
+        )
         # First call should return False (alert already sent today)
-        mock_data_cache.should_send_alert_for_transition = MagicMock(return_value=False)
-        mock_data_cache.record_alert_sent = MagicMock()
-        mock_data_cache.update_risk_level = MagicMock()
-        mock_data_cache.ensure_complete_weather_data.return_value = {
-            "air_temp": 32,
-            "relative_humidity": 12,
-            "wind_speed": 25,
-            "wind_gust": 35,
-            "soil_moisture_15cm": 8
-        }
+        mock_data_cache.should_send_alert_for_transition.return_value = False
         
         # Mock API data
         mock_get_synoptic_data.return_value = {"data": "sample"}
         
         # Mock calculating risk level to Red (would normally trigger an alert)
-        mock_calculate_risk.return_value = ("Red", "High temperature and low humidity")
+        mock_calculate_risk.return_value = RED_RISK_RESULT
         
         # Mock subscribers list
         mock_get_subscribers.return_value = {"subscribers": ["test@example.com"]}
         
         # Set up the async function to be called synchronously
         async def run_refresh():
-            return await refresh_data_cache()
+            result = await refresh_data_cache()
+            # The alert email is sent in the background
+            await wait_for_pending_alerts()
+            return result
             
         # Run the async function in an event loop
         loop = asyncio.new_event_loop()
@@ -75,7 +62,7 @@ class TestOrangeToRedAlertCalendarLimitIntegration(unittest.TestCase):
         mock_send_alert.assert_not_called()  # Should NOT try to send an alert
         
         # Verify our methods were called correctly
-        mock_data_cache.should_send_alert_for_transition.assert_called_once_with("Red")
+        mock_data_cache.should_send_alert_for_transition.assert_called_once_with("Red", ignore_daily_limit=False)
         mock_data_cache.record_alert_sent.assert_not_called()  # Should NOT record alert sent
         mock_data_cache.update_risk_level.assert_called_once_with("Red")
 
@@ -93,37 +80,20 @@ class TestOrangeToRedAlertCalendarLimitIntegration(unittest.TestCase):
         yesterday = current_time - timedelta(days=1)
         yesterday_evening = yesterday.replace(hour=23, minute=59, second=59)  # 23:59:59 yesterday
         
-        mock_data_cache.update_in_progress = False
-        mock_data_cache.previous_risk_level = "Orange"
-        mock_data_cache.risk_level_timestamp = current_time  # Just after midnight
-        mock_data_cache.last_alerted_timestamp = yesterday_evening  # Just before midnight
-        mock_data_cache.max_retries = 5
-        mock_data_cache.retry_delay = 0
-        mock_data_cache.update_timeout = 15
-        mock_data_cache.refresh_task_active = False
-        mock_data_cache.using_cached_data = False
-        mock_data_cache.cached_fields = {"temperature": False, "humidity": False, "wind_speed": False, "soil_moisture": False}
-        
-        # Mock the methods
-        mock_data_cache.reset_update_event = MagicMock()
-        mock_data_cache.update_cache = MagicMock()
+        configure_refresh_cache(
+            mock_data_cache,
+            previous_risk_level="Orange",
+            risk_level_timestamp=current_time,  # Just after midnight
+            last_alerted_timestamp=yesterday_evening,  # Just before midnight
+        )
         # Should return True because it's a new day
-        mock_data_cache.should_send_alert_for_transition = MagicMock(return_value=True)
-        mock_data_cache.record_alert_sent = MagicMock()
-        mock_data_cache.update_risk_level = MagicMock()
-        mock_data_cache.ensure_complete_weather_data.return_value = {
-            "air_temp": 32,
-            "relative_humidity": 12,
-            "wind_speed": 25,
-            "wind_gust": 35,
-            "soil_moisture_15cm": 8
-        }
+        mock_data_cache.should_send_alert_for_transition.return_value = True
         
         # Mock API data
         mock_get_synoptic_data.return_value = {"data": "sample"}
         
         # Mock calculating risk level to Red
-        mock_calculate_risk.return_value = ("Red", "High temperature and low humidity")
+        mock_calculate_risk.return_value = RED_RISK_RESULT
         
         # Mock subscribers list
         mock_get_subscribers.return_value = {"subscribers": ["test@example.com"]}
@@ -133,7 +103,10 @@ class TestOrangeToRedAlertCalendarLimitIntegration(unittest.TestCase):
         
         # Set up the async function to be called synchronously
         async def run_refresh():
-            return await refresh_data_cache()
+            result = await refresh_data_cache()
+            # The alert email is sent in the background
+            await wait_for_pending_alerts()
+            return result
             
         # Run the async function in an event loop
         loop = asyncio.new_event_loop()
@@ -148,7 +121,7 @@ class TestOrangeToRedAlertCalendarLimitIntegration(unittest.TestCase):
         mock_send_alert.assert_called_once()  # Should send alert because it's a new day
         
         # Verify our methods were called correctly
-        mock_data_cache.should_send_alert_for_transition.assert_called_once_with("Red")
+        mock_data_cache.should_send_alert_for_transition.assert_called_once_with("Red", ignore_daily_limit=False)
         mock_data_cache.record_alert_sent.assert_called_once()  # Should record alert was sent
         mock_data_cache.update_risk_level.assert_called_once_with("Red")
 
@@ -1,57 +1,49 @@
 import unittest
-from unittest.mock import patch, MagicMock
+from unittest.mock import DEFAULT, patch
 import asyncio
 import pytest
 from datetime import datetime, timedelta
 
 from cache import DataCache
-from cache_refresh import refresh_data_cache
+from cache_refresh import refresh_data_cache, wait_for_pending_alerts
 from config import TIMEZONE
+from tests.mock_utils import RED_RISK_RESULT, configure_refresh_cache
 
 class TestRiskLevelPersistence(unittest.TestCase):
     """Test the persistence of risk levels across server restarts."""
 
-    @patch('cache_refresh.get_active_subscribers')
-    @patch('cache_refresh.send_orange_to_red_alert')
-    @patch('cache_refresh.calculate_fire_risk')
-    @patch('cache_refresh.get_synoptic_data')
-    @patch('cache_refresh.data_cache')
-    def test_risk_level_persistence_during_restart(self, mock_data_cache, mock_get_synoptic_data, 
-                                                  mock_calculate_risk, mock_send_alert, 
-                                                  mock_get_subscribers):
+    @patch.multiple(
+        'cache_refresh',
+        get_active_subscribers=DEFAULT,
+        send_orange_to_red_alert=DEFAULT,
+        calculate_fire_risk=DEFAULT,
+        get_synoptic_data=DEFAULT,
+        data_cache=DEFAULT,
+    )
+    def test_risk_level_persistence_during_restart(self, **mocks):
         """Test that risk level transitions are detected even after a server restart."""
+        mock_data_cache = mocks['data_cache']
+        mock_get_synoptic_data = mocks['get_synoptic_data']
+        mock_calculate_risk = mocks['calculate_fire_risk']
+        mock_send_alert = mocks['send_orange_to_red_alert']
+        mock_get_subscribers = mocks['get_active_subscribers']
         # Set up initial state - server running with Orange risk level
         current_time = datetime.now(TIMEZONE)
         previous_time = current_time - timedelta(hours=1)
 
         # Set up required mock attributes
-        mock_data_cache.previous_risk_level = "Orange"
-        mock_data_cache.risk_level_timestamp = previous_time
-        mock_data_cache.last_alerted_timestamp = None
-        mock_data_cache.update_in_progress = False
-        mock_data_cache.max_retries = 5
-        mock_data_cache.retry_delay = 0
-        mock_data_cache.update_timeout = 15
-        mock_data_cache.refresh_task_active = False
-        mock_data_cache.using_cached_data = False
-        
-        # Mock the methods
-        mock_data_cache.reset_update_event = MagicMock()
-        mock_data_cache.update_cache = MagicMock()
-        mock_data_cache.cached_fields = {"temperature": False, "humidity": False, "wind_speed": False, "soil_moisture": False}
-        mock_data_cache.ensure_complete_weather_data.return_value = {
-            "air_temp": 32,
-            "relative_humidity": 12,
-            "wind_speed": 25,
-            "wind_gust": 35,
-            "soil_moisture_15cm": 8
-        }
+        configure_refresh_cache(
+            mock_data_cache,
+            previous_risk_level="Orange",
+            risk_level_timestamp=previous_time,
+            last_alerted_timestamp=None,
+        )
         
         # Mock get_synoptic_data to return sample weather data
         mock_get_synoptic_data.return_value = {"data": "sample"}
         
         # Mock calculate_fire_risk to return "Red" risk level
-        mock_calculate_risk.return_value = ("Red", "High temperature and low humidity")
+        mock_calculate_risk.return_value = RED_RISK_RESULT
         
         # Mock should_send_alert_for_transition to test our persistence logic
         mock_data_cache.should_send_alert_for_transition.return_value = True
@@ -64,7 +56,10 @@ class TestRiskLevelPersistence(unittest.TestCase):
         
         # Set up the async function to be called synchronously
         async def run_refresh():
-            return await refresh_data_cache()
+            result = await refresh_data_cache()
+            # The alert email is sent in the background
+            await wait_for_pending_alerts()
+            return result
             
         # Run the async function in an event loop
         loop = asyncio.new_event_loop()
@@ -77,7 +72,7 @@ class TestRiskLevelPersistence(unittest.TestCase):
         self.assertTrue(result)  # Refresh should be successful
         
         # Verify our persistence logic was called to check for missed transitions
-        mock_data_cache.should_send_alert_for_transition.assert_called_once_with("Red")
+        mock_data_cache.should_send_alert_for_transition.assert_called_once_with("Red", ignore_daily_limit=False)
         
         # Verify alert was sent
         mock_send_alert.assert_called_once()
@@ -86,55 +81,49 @@ class TestRiskLevelPersistence(unittest.TestCase):
         # Verify risk level was updated
         mock_data_cache.update_risk_level.assert_called_once_with("Red")
         
-    @patch('cache_refresh.get_active_subscribers')
-    @patch('cache_refresh.send_orange_to_red_alert')
-    @patch('cache_refresh.calculate_fire_risk')
-    @patch('cache_refresh.get_synoptic_data')
-    @patch('cache_refresh.data_cache')
-    def test_no_duplicate_alerts_after_restart(self, mock_data_cache, mock_get_synoptic_data, 
-                                              mock_calculate_risk, mock_send_alert, 
-                                              mock_get_subscribers):
+    @patch.multiple(
+        'cache_refresh',
+        get_active_subscribers=DEFAULT,
+        send_orange_to_red_alert=DEFAULT,
+        calculate_fire_risk=DEFAULT,
+        get_synoptic_data=DEFAULT,
+        data_cache=DEFAULT,
+    )
+    def test_no_duplicate_alerts_after_restart(self, **mocks):
         """Test that alerts aren't sent twice for the same transition after a restart."""
+        mock_data_cache = mocks['data_cache']
+        mock_get_synoptic_data = mocks['get_synoptic_data']
+        mock_calculate_risk = mocks['calculate_fire_risk']
+        mock_send_alert = mocks['send_orange_to_red_alert']
+        mock_get_subscribers = mocks['get_active_subscribers']
         # Set up initial state - server restarting after already having sent an alert
         current_time = datetime.now(TIMEZONE)
         previous_time = current_time - timedelta(hours=1)
         alert_time = current_time - timedelta(minutes=30)  # Alert was sent 30 minutes ago
 
         # Set up required mock attributes
-        mock_data_cache.previous_risk_level = "Orange"
-        mock_data_cache.risk_level_timestamp = previous_time
-        mock_data_cache.last_alerted_timestamp = alert_time  # Alert was already sent
-        mock_data_cache.update_in_progress = False
-        mock_data_cache.max_retries = 5
-        mock_data_cache.retry_delay = 0
-        mock_data_cache.update_timeout = 15
-        mock_data_cache.refresh_task_active = False
-        mock_data_cache.using_cached_data = False
-        
-        # Mock the methods
-        mock_data_cache.reset_update_event = MagicMock()
-        mock_data_cache.update_cache = MagicMock()
-        mock_data_cache.cached_fields = {"temperature": False, "humidity": False, "wind_speed": False, "soil_moisture": False}
-        mock_data_cache.ensure_complete_weather_data.return_value = {
-            "air_temp": 32,
-            "relative_humidity": 12,
-            "wind_speed": 25,
-            "wind_gust": 35,
-            "soil_moisture_15cm": 8
-        }
+        configure_refresh_cache(
+            mock_data_cache,
+            previous_risk_level="Orange",
+            risk_level_timestamp=previous_time,
+            last_alerted_timestamp=alert_time,  # Alert was already sent
+        )
         
         # Mock get_synoptic_data to return sample weather data
         mock_get_synoptic_data.return_value = {"data": "sample"}
         
         # Mock calculate_fire_risk to return "Red" risk level
-        mock_calculate_risk.return_value = ("Red", "High temperature and low humidity")
+        mock_calculate_risk.return_value = RED_RISK_RESULT
         
         # Mock should_send_alert_for_transition to test our persistence logic - should return False
         mock_data_cache.should_send_alert_for_transition.return_value = False
         
         # Set up the async function to be called synchronously
         async def run_refresh():
-            return await refresh_data_cache()
+            result = await refresh_data_cache()
+            # The alert email is sent in the background
+            await wait_for_pending_alerts()
+            return result
             
         # Run the async function in an event loop
         loop = asyncio.new_event_loop()
@@ -147,7 +136,7 @@ class TestRiskLevelPersistence(unittest.TestCase):
         self.assertTrue(result)  # Refresh should be successful
         
         # Verify our persistence logic was called
-        mock_data_cache.should_send_alert_for_transition.assert_called_once_with("Red")
+        mock_data_cache.should_send_alert_for_transition.assert_called_once_with("Red", ignore_daily_limit=False)
         
         # Verify no alert was sent (since we already alerted)
         mock_send_alert.assert_not_called()
@@ -182,11 +171,13 @@ class TestRiskLevelPersistence(unittest.TestCase):
         cache.last_alerted_timestamp = current_time - timedelta(minutes=30)
         self.assertFalse(cache.should_send_alert_for_transition("Red"))
         
-        # Test case 5: New transition after last alert
+        # Test case 5: New transition after last alert, on a later calendar day
+        # (alerts are limited to one per day)
         cache.previous_risk_level = "Orange"
         cache.risk_level_timestamp = current_time - timedelta(minutes=10)  # Risk changed 10 minutes ago
-        cache.last_alerted_timestamp = current_time - timedelta(hours=1)   # Last alert was 1 hour ago
+        cache.last_alerted_timestamp = current_time - timedelta(days=1)    # Last alert was yesterday
         self.assertTrue(cache.should_send_alert_for_transition("Red"))
+
     
     def test_update_risk_level(self):
         """Test the update_risk_level method of DataCache."""
@@ -24,14 +24,12 @@ MOCK_FIRE_RISK_DATA = {
 class TestSimplifiedCache:
     """Tests for the simplified snapshot-based caching system"""
     
-    def setup_method(self):
+    @pytest.fixture(autouse=True)
+    def setup_cache(self, tmp_path):
         """Set up a fresh cache instance for each test"""
         self.cache = DataCache()
         # Override cache file path to avoid conflicts with real cache
-        self.cache.cache_file = "data/test_weather_cache.json"
-        # Create a test directory if it doesn't exist
-        import os
-        os.makedirs("data", exist_ok=True)
+        self.cache.cache_file = tmp_path / "test_weather_cache.json"
         
         # Reset internal state and reinitialize with default values
         current_time = datetime.now(TIMEZONE)
@@ -15,8 +15,7 @@ async def test_toggle_test_mode_resets_cached_fields(mock_refresh_data_cache, cl
     try:
         # Setup: First set all cached fields to True (as if test mode was ON)
         data_cache.using_cached_data = True
-        for field in data_cache.cached_fields:
-            data_cache.cached_fields[field] = True
+        data_cache.cached_fields = dict.fromkeys(data_cache.cached_fields, True)
             
         # Verify our setup worked
         assert data_cache.using_cached_data is True
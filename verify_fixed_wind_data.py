@@ -2,7 +2,6 @@ import os
 import sys
 import json
 from datetime import datetime, timedelta
-import pytz
 
 # Add the current directory to path so we can import local modules
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))